@@ -1,2 +1,14 @@
-from .api import dictfy, filter, useobj, objfield, dictfield, newfield
+import sys
+
+from .api import (
+    dictfy, filter, useobj, objfield, dictfield, newfield, compile,
+    dictfy_iter, filter_iter, dump, dumps, dictfy_columns, filter_columns,
+    lazy, access, auto, paged, batchobj, refresh
+)
+from .cache import Cache
 from .exceptions import FormatError
+from .trace import Tracer, Profile
+
+if sys.version_info >= (3, 5):
+    # Coroutine APIs need async/await syntax
+    from .aio import adictfy, afilter
@@ -0,0 +1,140 @@
+import asyncio
+import inspect
+from operator import attrgetter, itemgetter, getitem
+
+from .factory import bind_hook
+from .plan import Plan, FLAT, NEW, COMPUTED, EMPTY, NESTED
+
+
+class Pending(object):
+    # Placeholder of a field whose value is being awaited
+    __slots__ = ("container", "key", "awaitable", "child")
+
+    def __init__(self, container, key, awaitable, child):
+        self.container = container
+        self.key = key
+        self.awaitable = awaitable
+        self.child = child
+
+
+class Evaluation(object):
+    # Evaluate plan nodes synchronously, leaving placeholders for
+    # awaitable values which are then awaited concurrently level by level
+    def __init__(self, getter, flat_obj, nested_flat_obj, nested_iter_obj,
+                 limit):
+        self.get = getitem if getter is itemgetter else getattr
+        self.flat_obj = flat_obj
+        self.nested_flat_obj = nested_flat_obj
+        self.nested_iter_obj = nested_iter_obj
+        self.limit = limit
+        self.pending = []
+
+    def set(self, container, key, value, child):
+        if inspect.isawaitable(value):
+            pending = Pending(container, key, value, child)
+            self.pending.append(pending)
+            container[key] = pending
+        elif child is None:
+            container[key] = value
+        else:
+            container[key] = self.node(child, value)
+
+    def node(self, node, obj):
+        if node.iterable:
+            if node.page is not None:
+                obj = node.page.paginate(obj)
+            return [self.node(node.child, sub_obj) for sub_obj in obj]
+
+        fields_container = {}
+        for field in node.fields:
+            name = field.name
+            if field.kind == NEW:
+                fields_container[name] = field.value
+                continue
+            elif field.kind == EMPTY:
+                fields_container[name] = {}
+                continue
+            elif field.kind == COMPUTED:
+                self.set(
+                    fields_container, name, field.value(obj), field.child
+                )
+                continue
+
+            if field.access is None:
+                value = self.get(obj, name)
+            else:
+                value = field.access(name)(obj)
+            if field.kind == FLAT:
+                hook = self.flat_obj
+            elif field.kind == NESTED:
+                hook = self.nested_flat_obj
+            else:
+                hook = self.nested_iter_obj
+
+            if hook is not None:
+                value = hook(value, obj, name)
+            self.set(fields_container, name, value, field.child)
+        return fields_container
+
+    async def limited(self, semaphore, awaitable):
+        async with semaphore:
+            return await awaitable
+
+    async def run(self, node, obj):
+        semaphore = None
+        if self.limit is not None:
+            semaphore = asyncio.Semaphore(self.limit)
+
+        try:
+            result = self.node(node, obj)
+            while self.pending:
+                pending, self.pending = self.pending, []
+                awaitables = [entry.awaitable for entry in pending]
+                if semaphore is not None:
+                    awaitables = [
+                        self.limited(semaphore, awaitable)
+                        for awaitable in awaitables
+                    ]
+                values = await asyncio.gather(*awaitables)
+                for entry, value in zip(pending, values):
+                    if entry.container[entry.key] is not entry:
+                        # Field was overwritten by a field with same name
+                        continue
+                    self.set(entry.container, entry.key, value, entry.child)
+        except BaseException:
+            # Don't leave coroutines which were never awaited
+            for entry in self.pending:
+                if inspect.iscoroutine(entry.awaitable):
+                    entry.awaitable.close()
+            raise
+        return result
+
+
+def evaluate(plan, obj, getter, flat_obj=None, nested_flat_obj=None,
+             nested_iter_obj=None, limit=None):
+    evaluation = Evaluation(
+        getter,
+        bind_hook(flat_obj),
+        bind_hook(nested_flat_obj),
+        bind_hook(nested_iter_obj),
+        limit
+    )
+    return evaluation.run(plan.root, obj)
+
+
+async def adictfy(
+        obj, query, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None, limit=None):
+    return await evaluate(
+        Plan(query), obj, attrgetter,
+        flat_obj, nested_flat_obj, nested_iter_obj, limit
+    )
+
+
+async def afilter(
+        obj, query, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None, limit=None):
+    return await evaluate(
+        Plan(query), obj, itemgetter,
+        flat_obj, nested_flat_obj, nested_iter_obj, limit
+    )
@@ -1,9 +1,42 @@
 from . import factory
 from . import filter as ft
+from . import plan
+from . import parallel
 
 def dictfy(
         obj, query, flat_obj=None,
-        nested_flat_obj=None, nested_iter_obj=None):
+        nested_flat_obj=None, nested_iter_obj=None,
+        workers=None, chunk_size=None, memo=None, refs=False,
+        engine=None, tracer=None, rows=None):
+    if workers is not None:
+        return parallel.evaluate(
+            plan.Plan(query),
+            "dictfy",
+            obj,
+            workers,
+            chunk_size,
+            flat_obj,
+            nested_flat_obj,
+            nested_iter_obj,
+            memo=memo,
+            refs=refs,
+            engine=engine,
+            tracer=tracer,
+            rows=rows,
+        )
+    if (memo is not None or refs or engine is not None or
+            tracer is not None or rows):
+        return plan.Plan(query).dictfy(
+            obj,
+            flat_obj,
+            nested_flat_obj,
+            nested_iter_obj,
+            memo,
+            refs,
+            engine,
+            tracer,
+            rows,
+        )
     return factory._dict(
         obj,
         query,
@@ -15,7 +48,38 @@ def dictfy(
 
 def filter(
         obj, query, flat_obj=None,
-        nested_flat_obj=None, nested_iter_obj=None):
+        nested_flat_obj=None, nested_iter_obj=None,
+        workers=None, chunk_size=None, memo=None, refs=False,
+        engine=None, tracer=None, rows=None):
+    if workers is not None:
+        return parallel.evaluate(
+            plan.Plan(query),
+            "filter",
+            obj,
+            workers,
+            chunk_size,
+            flat_obj,
+            nested_flat_obj,
+            nested_iter_obj,
+            memo=memo,
+            refs=refs,
+            engine=engine,
+            tracer=tracer,
+            rows=rows,
+        )
+    if (memo is not None or refs or engine is not None or
+            tracer is not None or rows):
+        return plan.Plan(query).filter(
+            obj,
+            flat_obj,
+            nested_flat_obj,
+            nested_iter_obj,
+            memo,
+            refs,
+            engine,
+            tracer,
+            rows,
+        )
     return ft.filtered_dict(
         obj,
         query,
@@ -24,6 +88,156 @@ def filter(
         nested_iter_obj,
     )
 
+
+def auto(
+        obj, query, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None,
+        workers=None, chunk_size=None, memo=None, refs=False,
+        engine=None, tracer=None, rows=None):
+    if workers is not None:
+        return parallel.evaluate(
+            plan.Plan(query),
+            "auto",
+            obj,
+            workers,
+            chunk_size,
+            flat_obj,
+            nested_flat_obj,
+            nested_iter_obj,
+            memo=memo,
+            refs=refs,
+            engine=engine,
+            tracer=tracer,
+            rows=rows,
+        )
+    if (memo is not None or refs or engine is not None or
+            tracer is not None or rows):
+        return plan.Plan(query).auto(
+            obj,
+            flat_obj,
+            nested_flat_obj,
+            nested_iter_obj,
+            memo,
+            refs,
+            engine,
+            tracer,
+            rows,
+        )
+    return factory._evaluate(
+        obj,
+        query,
+        factory.auto_get,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def dictfy_iter(
+        obj, query, path=None, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None):
+    return plan.Plan(query).dictfy_iter(
+        obj,
+        path,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def filter_iter(
+        obj, query, path=None, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None):
+    return plan.Plan(query).filter_iter(
+        obj,
+        path,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def dictfy_columns(
+        obj, query, dtype=None, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None):
+    return plan.Plan(query).dictfy_columns(
+        obj,
+        dtype,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def filter_columns(
+        obj, query, dtype=None, flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None):
+    return plan.Plan(query).filter_columns(
+        obj,
+        dtype,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def lazy(
+        obj, query, mode="dictfy", flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None):
+    return plan.Plan(query).lazy(
+        obj,
+        mode,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def dump(
+        obj, query, fp, mode="dictfy", flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None, **kwargs):
+    return plan.Plan(query).dump(
+        obj,
+        fp,
+        mode,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+        **kwargs
+    )
+
+
+def dumps(
+        obj, query, mode="dictfy", flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None, **kwargs):
+    return plan.Plan(query).dumps(
+        obj,
+        mode,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+        **kwargs
+    )
+
+
+def refresh(
+        previous, obj, query, dirty, mode="dictfy", flat_obj=None,
+        nested_flat_obj=None, nested_iter_obj=None):
+    return plan.Plan(query).refresh(
+        previous,
+        obj,
+        dirty,
+        mode,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj,
+    )
+
+
+def compile(query, codegen=False):
+    return plan.Plan(query, codegen)
+
+
 def useobj(function, query=None):
     return factory.UseObj(function, query)
 
@@ -48,5 +262,17 @@ def dictfield(field_name, call=False, args=tuple(), kwargs={}):
         return useobj(lambda obj: obj[field_name], query=None)
 
 
+def batchobj(function, query=None):
+    return factory.BatchObj(function, query)
+
+
 def newfield(value):
     return factory.NewField(value)
+
+
+def access(query, by="attr"):
+    return factory.Access(query, by)
+
+
+def paged(query, limit=None, offset=0):
+    return factory.Paged(query, limit, offset)
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+
+from .factory import bind_hook
+from .plan import field_value
+
+
+class Pending(object):
+    # Placeholder of a batchobj field whose value is being collected
+    __slots__ = ("container", "key", "obj", "field")
+
+    def __init__(self, container, key, obj, field):
+        self.container = container
+        self.key = key
+        self.obj = obj
+        self.field = field
+
+
+class Batch(object):
+    # Evaluate plan nodes leaving placeholders for batchobj fields, then
+    # resolve them level by level with one call per batchobj field
+    # and level. Nodes without batchobj fields below them are evaluated
+    # with the plan's own evaluators
+    def __init__(self, plan, getter, flat_obj, nested_flat_obj,
+                 nested_iter_obj):
+        self.plan = plan
+        self.getter = getter
+        self.hooks = (flat_obj, nested_flat_obj, nested_iter_obj)
+        self.bound_hooks = (
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj)
+        )
+        self.evaluators = {}
+        self.pending = []
+
+    def node(self, node, obj):
+        if node not in self.plan.batched:
+            evaluate = self.evaluators.get(node)
+            if evaluate is None:
+                evaluate = self.evaluators[node] = self.plan.evaluator(
+                    self.getter, *self.hooks, node=node
+                )
+            return evaluate(obj)
+
+        if node.iterable:
+            if node.page is not None:
+                obj = node.page.paginate(obj)
+            return [self.node(node.child, sub_obj) for sub_obj in obj]
+
+        fields_container = {}
+        for field in node.fields:
+            name = field.name
+            if field.batch is not None:
+                pending = Pending(fields_container, name, obj, field)
+                self.pending.append(pending)
+                fields_container[name] = pending
+                continue
+
+            value = field_value(field, self.getter, obj, *self.bound_hooks)
+            if field.child is not None:
+                value = self.node(field.child, value)
+            fields_container[name] = value
+        return fields_container
+
+    def resolve(self, field, pending):
+        objs = [entry.obj for entry in pending]
+        values = list(field.batch(objs))
+        if len(values) != len(objs):
+            raise ValueError(
+                "batchobj function of '%s' field returned %d values "
+                "for %d objects." % (field.name, len(values), len(objs))
+            )
+
+        child = field.child
+        for entry, value in zip(pending, values):
+            if child is not None:
+                value = self.node(child, value)
+            entry.container[entry.key] = value
+
+    def run(self, node, obj):
+        result = self.node(node, obj)
+        while self.pending:
+            pending, self.pending = self.pending, []
+            fields = OrderedDict()
+            for entry in pending:
+                if entry.container[entry.key] is not entry:
+                    # Field was overwritten by a field with same name
+                    continue
+                fields.setdefault(entry.field, []).append(entry)
+            for field, entries in fields.items():
+                self.resolve(field, entries)
+        return result
+
+
+def evaluate(plan, obj, getter, flat_obj=None, nested_flat_obj=None,
+             nested_iter_obj=None):
+    batch = Batch(
+        plan, getter, flat_obj, nested_flat_obj, nested_iter_obj
+    )
+    return batch.run(plan.root, obj)
@@ -0,0 +1,391 @@
+# Benchmarks of dictfy and filter hot paths, run
+#
+#     python -m dictfier.bench [--scale N] [--repeat N] [--only NAME ...]
+#                              [--json FILE]
+#     python -m dictfier.bench --compare OLD.json NEW.json
+#     python -m dictfier.bench --memory [--scale N]
+#
+# Every workload is run with every engine, reporting calls per second,
+# objects converted per second and peak memory allocated during a call.
+# --memory reports memory held by results of identically shaped
+# objects in every output format instead.
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+from collections import namedtuple
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from . import api
+from .plan import Plan
+
+
+# Number of extra flat fields on every record
+WIDE_FIELDS = 40
+
+
+class Record(object):
+    def __init__(self, index):
+        self.id = index
+        self.name = "record-%d" % index
+        self.score = index * 0.5
+        self.active = bool(index % 2)
+        self.email = "record%d@example.com" % index
+        for field in range(WIDE_FIELDS):
+            setattr(self, "field%d" % field, field)
+        self.parent = None
+        self.children = []
+
+
+# Names of fields of records converted by flat workloads
+FLAT_FIELDS = ("id", "name", "score", "active", "email")
+
+RecordTuple = namedtuple("RecordTuple", FLAT_FIELDS)
+
+
+class SlotsRecord(object):
+    __slots__ = FLAT_FIELDS
+
+    def __init__(self, *values):
+        for name, value in zip(FLAT_FIELDS, values):
+            setattr(self, name, value)
+
+
+def record_values(index):
+    return (
+        index, "record-%d" % index, index * 0.5, bool(index % 2),
+        "record%d@example.com" % index
+    )
+
+
+def flat_workload(cls, scale):
+    records = [cls(*record_values(index)) for index in range(scale)]
+    return records, [list(FLAT_FIELDS)], {}, len(records)
+
+
+def namedtuple_flat(scale):
+    return flat_workload(RecordTuple, scale)
+
+
+def slots_flat(scale):
+    return flat_workload(SlotsRecord, scale)
+
+
+def dataclass_flat(scale):
+    from dataclasses import make_dataclass
+    return flat_workload(make_dataclass("DataRecord", FLAT_FIELDS), scale)
+
+
+def wide_flat(scale):
+    records = [Record(index) for index in range(max(scale // 10, 1))]
+    query = [["id"] + ["field%d" % field for field in range(WIDE_FIELDS)]]
+    return records, query, {}, len(records)
+
+
+def deep_nesting(scale):
+    # Chain of records as deep as recursion limit comfortably allows
+    depth = min(max(scale // 1000, 10), 400)
+    root = record = Record(0)
+    for index in range(1, depth):
+        child = Record(index)
+        record.children = [child]
+        record = child
+    query = ["id", "name"]
+    query.append({"children": [query]})
+    return root, query, {}, depth
+
+
+def large_iterable(scale):
+    records = [Record(index) for index in range(scale)]
+    query = [["id", "name", "score", "active"]]
+    return records, query, {}, len(records)
+
+
+def nested_iterable(scale):
+    records = [Record(index) for index in range(max(scale // 10, 1))]
+    for record in records:
+        record.children = [Record(index) for index in range(10)]
+    query = [["id", "name", {"children": [["id", "name", "score"]]}]]
+    return records, query, {}, len(records) * 11
+
+
+def hook_heavy(scale):
+    records = [Record(index) for index in range(max(scale // 10, 1))]
+    for record in records:
+        record.parent = Record(0)
+        record.children = [Record(index) for index in range(3)]
+    query = [[
+        "id", "name", "email",
+        {"parent": ["id"], "children": [["id", "name"]]}
+    ]]
+    kwargs = {
+        "flat_obj": lambda obj, parent, name: obj,
+        "nested_flat_obj": lambda obj: obj,
+        "nested_iter_obj": lambda obj, parent: obj,
+    }
+    return records, query, kwargs, len(records) * 5
+
+
+def useobj_heavy(scale):
+    records = [Record(index) for index in range(max(scale // 10, 1))]
+    query = [[
+        "id",
+        {
+            "label": api.useobj(lambda obj: obj.name.upper()),
+            "double": api.useobj(lambda obj: obj.score * 2),
+            "renamed": api.objfield("email"),
+            "constant": api.newfield("dictfier"),
+            "parent": api.useobj(lambda obj: obj, ["id", "name"]),
+        }
+    ]]
+    return records, query, {}, len(records)
+
+
+def filter_flat(scale):
+    records = [
+        {"id": index, "name": "record-%d" % index, "score": index * 0.5}
+        for index in range(scale)
+    ]
+    query = [["id", "name", "score"]]
+    return records, query, {"mode": "filter"}, len(records)
+
+
+def single_object(scale):
+    # A single small object per call, where validating the query and
+    # other work done once per call is most of the time
+    record = Record(0)
+    record.parent = Record(1)
+    query = ["id", "name", "score", {"parent": ["id", "name"]}]
+    return record, query, {}, 2
+
+
+WORKLOADS = [
+    ("single_object", single_object),
+    ("wide_flat", wide_flat),
+    ("deep_nesting", deep_nesting),
+    ("large_iterable", large_iterable),
+    ("nested_iterable", nested_iterable),
+    ("hook_heavy", hook_heavy),
+    ("useobj_heavy", useobj_heavy),
+    ("filter_flat", filter_flat),
+    ("namedtuple_flat", namedtuple_flat),
+    ("slots_flat", slots_flat),
+]
+
+if sys.version_info >= (3, 7):
+    WORKLOADS.append(("dataclass_flat", dataclass_flat))
+
+
+def engines(query, mode):
+    # Callables converting an obj with the same query
+    plan = Plan(query)
+    generated = Plan(query, codegen=True)
+    function = api.filter if mode == "filter" else api.dictfy
+    return [
+        ("interpreted", lambda obj, **kwargs: function(obj, query, **kwargs)),
+        ("compiled", getattr(plan, mode)),
+        ("codegen", getattr(generated, mode)),
+        ("stack", lambda obj, **kwargs: getattr(plan, mode)(
+            obj, engine="stack", **kwargs
+        )),
+    ]
+
+
+def peak_memory(function):
+    # Peak bytes allocated while function runs
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def retained_memory(function):
+    # Bytes still allocated when function returns, i.e. held by its result
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+# Output formats compared by memory benchmark
+FORMATS = [
+    ("dicts", {}),
+    ("rows", {"rows": True}),
+    ("named rows", {"rows": "named"}),
+]
+
+
+def memory(scale=1000000, out=sys.stdout):
+    # Memory held by results of scale objects of the same shape
+    records = [SlotsRecord(*record_values(index)) for index in range(scale)]
+    query = [list(FLAT_FIELDS) + [{"kind": api.newfield("record")}]]
+    plan = Plan(query)
+    results = []
+    for name, kwargs in FORMATS:
+        retained = retained_memory(lambda: plan.dictfy(records, **kwargs))
+        record = {
+            "format": name,
+            "objects": scale,
+            "retained_memory": retained,
+        }
+        results.append(record)
+        if out is not None and retained is not None:
+            out.write("%-12s %14.1f MiB %10.1f bytes/object\n" % (
+                name, retained / 1048576.0, retained / float(scale)
+            ))
+    return results
+
+
+def measure(function, repeat):
+    # Calls per second of the fastest of repeat runs
+    number = 1
+    while True:
+        elapsed = timeit.timeit(function, number=number)
+        if elapsed >= 0.2 or number >= 1000:
+            break
+        number *= 2
+    best = min([elapsed] + timeit.repeat(
+        function, number=number, repeat=max(repeat - 1, 0)
+    ))
+    return number / best
+
+
+def run(scale=100000, repeat=3, only=None, out=sys.stdout):
+    results = []
+    for name, workload in WORKLOADS:
+        if only and name not in only:
+            continue
+        obj, query, kwargs, objects = workload(scale)
+        kwargs = dict(kwargs)
+        mode = kwargs.pop("mode", "dictfy")
+
+        expected = None
+        for engine, function in engines(query, mode):
+            call = lambda: function(obj, **kwargs)
+            result = call()
+            if expected is None:
+                expected = result
+            elif result != expected:
+                raise AssertionError(
+                    "%s engine gave a different result on %s workload"
+                    % (engine, name)
+                )
+
+            ops = measure(call, repeat)
+            record = {
+                "workload": name,
+                "engine": engine,
+                "ops_per_sec": ops,
+                "objects_per_sec": ops * objects,
+                "peak_memory": peak_memory(call),
+            }
+            results.append(record)
+            if out is not None:
+                report(record, out)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "scale": scale,
+        "results": results,
+    }
+
+
+def report(record, out):
+    memory = record["peak_memory"]
+    out.write("%-16s %-12s %12.2f ops/s %14.0f objects/s %12s\n" % (
+        record["workload"], record["engine"],
+        record["ops_per_sec"], record["objects_per_sec"],
+        "-" if memory is None else "%.1f KiB" % (memory / 1024.0)
+    ))
+
+
+def compare(old, new, out=sys.stdout):
+    # Print speed and memory change of every workload/engine pair
+    old_results = dict(
+        ((record["workload"], record["engine"]), record)
+        for record in old["results"]
+    )
+    out.write("%-16s %-12s %10s %10s\n" % (
+        "workload", "engine", "speed", "memory"
+    ))
+    for record in new["results"]:
+        key = (record["workload"], record["engine"])
+        if key not in old_results:
+            continue
+        before = old_results[key]
+        speed = record["ops_per_sec"] / before["ops_per_sec"]
+        memory = "-"
+        if record["peak_memory"] and before["peak_memory"]:
+            memory = "%.2fx" % (
+                record["peak_memory"] / float(before["peak_memory"])
+            )
+        out.write("%-16s %-12s %9.2fx %10s\n" % (
+            record["workload"], record["engine"], speed, memory
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m dictfier.bench",
+        description="Benchmark dictfy and filter hot paths."
+    )
+    parser.add_argument(
+        "--scale", type=int, default=100000,
+        help="number of objects in large workloads (default 100000)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="number of timed runs, the fastest is reported (default 3)"
+    )
+    parser.add_argument(
+        "--only", nargs="+", metavar="WORKLOAD",
+        choices=[name for name, workload in WORKLOADS],
+        help="run only these workloads"
+    )
+    parser.add_argument(
+        "--json", metavar="FILE", help="write results as JSON to FILE"
+    )
+    parser.add_argument(
+        "--memory", action="store_true",
+        help="report memory held by results in every output format"
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"),
+        help="compare two JSON result files instead of running"
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    if args.memory:
+        results = memory(args.scale)
+    else:
+        results = run(args.scale, args.repeat, args.only)
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+
+try:
+    from time import monotonic as clock
+except ImportError:
+    from time import time as clock
+
+from . import api
+from .factory import UseObj, BatchObj, NewField, Access, Paged
+
+
+def value_key(value):
+    # Equal values of different types(True, 1 and 1.0) give
+    # different results, so their keys must differ too
+    if isinstance(value, (tuple, frozenset)):
+        return (type(value), type(value)(value_key(item) for item in value))
+    return (type(value), value)
+
+
+def field_key(sub_field, expanding):
+    if isinstance(sub_field, NewField):
+        return ("newfield", value_key(sub_field.value))
+    elif isinstance(sub_field, (UseObj, BatchObj)):
+        query = sub_field.query
+        if query is not None:
+            query = query_key(query, expanding)
+        kind = "useobj" if isinstance(sub_field, UseObj) else "batchobj"
+        return (kind, sub_field.function, query)
+    elif isinstance(sub_field, (list, tuple, Paged)):
+        return query_key(sub_field, expanding)
+    # Invalid field, it's reported when query is evaluated
+    return ("invalid", sub_field)
+
+
+def query_key(query, expanding=None):
+    # Hashable key which is equal for queries of the same shape, a
+    # query which contains itself refers to itself by its depth.
+    # Hashing the key raises TypeError if newfield values are unhashable
+    if expanding is None:
+        expanding = {}
+
+    if isinstance(query, Paged):
+        return (
+            "paged", query.limit, query.offset,
+            query_key(query.query, expanding)
+        )
+
+    if id(query) in expanding:
+        return ("recursive", expanding[id(query)])
+    expanding[id(query)] = len(expanding)
+    try:
+        parts = []
+        for field in query:
+            if isinstance(field, dict):
+                parts.append(("fields",) + tuple(
+                    (value_key(name), field_key(sub_field, expanding))
+                    for name, sub_field in field.items()
+                ))
+            elif isinstance(field, (list, tuple, Paged)):
+                parts.append(query_key(field, expanding))
+            else:
+                parts.append(field)
+    finally:
+        del expanding[id(query)]
+
+    if isinstance(query, Access):
+        return ("access", query.by, tuple(parts))
+    return ("query", tuple(parts))
+
+
+class Cache(object):
+    # Results of dictfy, filter and auto kept by key of the obj,
+    # query and options, so converting the same obj with the same
+    # query again is a dict lookup. key(obj) returns a hashable key of
+    # obj(None means obj is not cached), version(obj) returns its
+    # version, results of older versions are never returned
+    def __init__(self, key, version=None, maxsize=1024, ttl=None):
+        if maxsize is not None and (
+                not isinstance(maxsize, int) or maxsize < 1):
+            raise ValueError(
+                "maxsize must be None or a positive int, not '%s'." % maxsize
+            )
+        self.key = key
+        self.version = version
+        self.maxsize = maxsize
+        # Seconds results are kept for, None means until evicted
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Entry key -> (result, version, expiry time), least
+        # recently used first
+        self.entries = OrderedDict()
+        # Obj key -> keys of its entries
+        self.objects = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def discard(self, entry_key):
+        self.entries.pop(entry_key, None)
+        keys = self.objects.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key)
+            if not keys:
+                del self.objects[entry_key[0]]
+
+    def store(self, entry_key, entry):
+        if self.maxsize is not None:
+            while len(self.entries) >= self.maxsize:
+                # Evict least recently used entry
+                self.discard(next(iter(self.entries)))
+        self.entries[entry_key] = entry
+        self.objects.setdefault(entry_key[0], set()).add(entry_key)
+
+    def evaluate(self, function, obj, query, kwargs):
+        obj_key = self.key(obj)
+        if obj_key is None:
+            return function(obj, query, **kwargs)
+
+        entry_key = (
+            obj_key, function, query_key(query), tuple(sorted(kwargs.items()))
+        )
+        try:
+            hash(entry_key)
+        except TypeError:
+            # Query or options can't be a key, don't cache
+            return function(obj, query, **kwargs)
+
+        version = None if self.version is None else self.version(obj)
+        now = clock()
+        entry = self.entries.pop(entry_key, None)
+        if entry is not None:
+            result, entry_version, expires = entry
+            if entry_version == version and (
+                    expires is None or expires > now):
+                # Move to the end, it's the most recently used now
+                self.entries[entry_key] = entry
+                self.hits += 1
+                return result
+            self.discard(entry_key)
+
+        self.misses += 1
+        result = function(obj, query, **kwargs)
+        expires = None if self.ttl is None else now + self.ttl
+        self.store(entry_key, (result, version, expires))
+        return result
+
+    def dictfy(self, obj, query, **kwargs):
+        return self.evaluate(api.dictfy, obj, query, kwargs)
+
+    def filter(self, obj, query, **kwargs):
+        return self.evaluate(api.filter, obj, query, kwargs)
+
+    def auto(self, obj, query, **kwargs):
+        return self.evaluate(api.auto, obj, query, kwargs)
+
+    def invalidate(self, key):
+        # Drop all results of obj with key, returns how many were dropped
+        entry_keys = self.objects.pop(key, ())
+        for entry_key in entry_keys:
+            self.entries.pop(entry_key, None)
+        return len(entry_keys)
+
+    def clear(self):
+        self.entries.clear()
+        self.objects.clear()
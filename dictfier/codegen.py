@@ -0,0 +1,177 @@
+import itertools
+import keyword
+import linecache
+import re
+from operator import attrgetter, itemgetter
+
+from .plan import FLAT, NEW, COMPUTED, EMPTY, NESTED
+
+
+INDENT = "    "
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Used to give every generated module a unique file name
+counter = itertools.count()
+
+
+def is_identifier(name):
+    return (
+        isinstance(name, str) and
+        IDENTIFIER.match(name) is not None and
+        not keyword.iskeyword(name)
+    )
+
+
+class Generator(object):
+    # Generate python source which evaluates plan nodes with
+    # straight-line attribute/item access and dict literals
+    def __init__(self, context):
+        self.getter = context.getter
+        self.flat_obj = context.flat_obj
+        self.nested_flat_obj = context.nested_flat_obj
+        self.nested_iter_obj = context.nested_iter_obj
+        self.namespace = {
+            "flat_obj": context.flat_obj,
+            "nested_flat_obj": context.nested_flat_obj,
+            "nested_iter_obj": context.nested_iter_obj,
+        }
+        self.functions = []
+        self.function_names = {}
+        self.expanding = set()
+        self.names = itertools.count()
+
+    def constant(self, prefix, value):
+        name = "_%s%d" % (prefix, next(self.names))
+        self.namespace[name] = value
+        return name
+
+    def literal(self, value):
+        # Source representation of a field name
+        if isinstance(value, str) and repr(value) == "'%s'" % value:
+            return repr(value)
+        return self.constant("k", value)
+
+    def get(self, var, field):
+        getter = field.access or self.getter
+        name = field.name
+        if getter is itemgetter:
+            return "%s[%s]" % (var, self.literal(name))
+        elif getter is not attrgetter:
+            # Custom accessor
+            return "%s(%s)" % (self.constant("g", getter(name)), var)
+        elif is_identifier(name):
+            return "%s.%s" % (var, name)
+        else:
+            return "getattr(%s, %s)" % (var, self.literal(name))
+
+    def function(self, node):
+        # Generate a function evaluating node against its argument
+        name = self.function_names.get(node)
+        if name is None:
+            name = "_n%d" % next(self.names)
+            self.function_names[node] = name
+            body = self.expand(node, "obj", 1, INDENT)
+            self.functions.append(
+                "def %s(obj):\n    return %s\n" % (name, body)
+            )
+        return name
+
+    def node(self, node, var, depth, indent):
+        # Expression evaluating node against an obj named var
+        if node in self.expanding:
+            # Node contains itself(cyclic plan), it can't be inlined
+            return "%s(%s)" % (self.function(node), var)
+
+        self.expanding.add(node)
+        try:
+            return self.expand(node, var, depth, indent)
+        finally:
+            self.expanding.discard(node)
+
+    def expand(self, node, var, depth, indent):
+        if node.iterable:
+            sub_obj = "_o%d" % depth
+            if node.page is not None:
+                var = "%s(%s)" % (
+                    self.constant("p", node.page.paginate), var
+                )
+            return "[\n%s%s\n%sfor %s in %s\n%s]" % (
+                indent + INDENT,
+                self.node(node.child, sub_obj, depth + 1, indent + INDENT),
+                indent + INDENT, sub_obj, var, indent
+            )
+
+        if not node.fields:
+            return "{}"
+
+        return "{\n%s\n%s}" % (",\n".join(
+            "%s%s: %s" % (
+                indent + INDENT,
+                self.literal(field.name),
+                self.field(field, var, depth, indent + INDENT)
+            )
+            for field in node.fields
+        ), indent)
+
+    def value(self, node, value, depth, indent):
+        # Expression evaluating node against an arbitrary expression,
+        # flat or nested nodes need a name to refer to their obj
+        if node.iterable:
+            return self.node(node, value, depth, indent)
+        return "%s(%s)" % (self.function(node), value)
+
+    def field(self, field, var, depth, indent):
+        name = field.name
+        if field.kind == FLAT:
+            value = self.get(var, field)
+            if self.flat_obj is not None:
+                value = "flat_obj(%s, %s, %s)" % (
+                    value, var, self.literal(name)
+                )
+            return value
+
+        elif field.kind == NEW:
+            return self.constant("v", field.value)
+
+        elif field.kind == EMPTY:
+            return "{}"
+
+        elif field.kind == COMPUTED:
+            value = "%s(%s)" % (self.constant("f", field.value), var)
+            if field.child is None:
+                return value
+            return self.value(field.child, value, depth, indent)
+
+        value = self.get(var, field)
+        hook = "nested_flat_obj" if field.kind == NESTED else "nested_iter_obj"
+        if getattr(self, hook) is not None:
+            value = "%s(%s, %s, %s)" % (
+                hook, value, var, self.literal(name)
+            )
+        return self.value(field.child, value, depth, indent)
+
+    def generate(self, root):
+        main = "def evaluate(obj):\n    return %s\n" % (
+            self.node(root, "obj", 1, INDENT)
+        )
+        return "\n\n".join(self.functions + [main])
+
+
+def generate(root, context):
+    # Return a compiled function which evaluates root plan node
+    # together with its source
+    generator = Generator(context)
+    source = generator.generate(root)
+
+    filename = "<dictfier generated %d>" % next(counter)
+    namespace = generator.namespace
+    exec(compile(source, filename, "exec"), namespace)
+
+    # Register source so that tracebacks can show generated code
+    linecache.cache[filename] = (
+        len(source), None, source.splitlines(True), filename
+    )
+
+    evaluate = namespace["evaluate"]
+    evaluate.source = source
+    return evaluate
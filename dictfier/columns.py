@@ -0,0 +1,84 @@
+from .exceptions import FormatError
+from .factory import bind_hook
+from .plan import FLAT, NEW, COMPUTED, EMPTY, NESTED, field_getter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def column(plan, field, getter, rows, flat_obj, nested_flat_obj,
+           nested_iter_obj):
+    # Values of a single field for all rows
+    name = field.name
+    if field.kind == NEW:
+        return [field.value] * len(rows)
+    elif field.kind == EMPTY:
+        return [{} for row in rows]
+    elif field.batch is not None:
+        # All rows at once
+        values = list(field.batch(rows))
+    elif field.kind == COMPUTED:
+        values = list(map(field.value, rows))
+    else:
+        get = field_getter(field, getter)
+        values = list(map(get, rows))
+        if field.kind == FLAT:
+            hook = flat_obj
+        elif field.kind == NESTED:
+            hook = nested_flat_obj
+        else:
+            hook = nested_iter_obj
+
+        if hook is not None:
+            values = [
+                hook(value, row, name)
+                for value, row in zip(values, rows)
+            ]
+
+    if field.child is None:
+        return values
+
+    evaluate = plan.evaluator(
+        getter, flat_obj, nested_flat_obj, nested_iter_obj,
+        node=field.child
+    )
+    return list(map(evaluate, values))
+
+
+def columns(plan, obj, getter, dtype=None, flat_obj=None,
+            nested_flat_obj=None, nested_iter_obj=None):
+    # Evaluate iterable query as a dict of lists, one list per field
+    node = plan.root
+    if not node.iterable or node.child.iterable:
+        message = "\"%s\" is not an iterable Query node." % str(node.query)
+        raise FormatError(message)
+
+    flat_obj = bind_hook(flat_obj)
+    nested_flat_obj = bind_hook(nested_flat_obj)
+    nested_iter_obj = bind_hook(nested_iter_obj)
+
+    if node.page is not None:
+        obj = node.page.paginate(obj)
+    rows = list(obj)
+    result = {}
+    for field in node.child.fields:
+        result[field.name] = column(
+            plan, field, getter, rows,
+            flat_obj, nested_flat_obj, nested_iter_obj
+        )
+
+    if dtype is None:
+        return result
+
+    if numpy is None:
+        raise ImportError(
+            "numpy is required to convert columns into structured array."
+        )
+
+    dtype = numpy.dtype(dtype)
+    array = numpy.empty(len(rows), dtype=dtype)
+    for name in dtype.names:
+        array[name] = result[name]
+    return array
@@ -0,0 +1,155 @@
+import json
+
+from .plan import (
+    FLAT, NEW, COMPUTED, EMPTY, NESTED, NESTED_ITER, field_getter
+)
+
+
+# Number of characters buffered before they are written to a file
+CHUNK_SIZE = 64 * 1024
+
+
+class Writer(object):
+    # Buffer small pieces of text and write them in big chunks
+    def __init__(self, write, chunk_size):
+        self._write = write
+        self.chunk_size = chunk_size
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self._write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+class Encoder(object):
+    # Walk plan nodes and write JSON text of the result straight
+    # away without building intermediate dicts and lists
+    def __init__(self, plan, getter, flat_obj, nested_flat_obj,
+                 nested_iter_obj, write, separators=None,
+                 ensure_ascii=True, allow_nan=True, default=None):
+        self.plan = plan
+        self.getter = getter
+        self.flat_obj = flat_obj
+        self.nested_flat_obj = nested_flat_obj
+        self.nested_iter_obj = nested_iter_obj
+        self.write = write
+
+        if separators is None:
+            separators = (", ", ": ")
+        self.item_separator, self.key_separator = separators
+        self.encode = json.JSONEncoder(
+            separators=separators,
+            ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan,
+            default=default
+        ).encode
+
+        # Encoded keys and getters of every flat or nested node visited
+        self.nodes = {}
+
+    def encode_key(self, key):
+        if isinstance(key, str):
+            return self.encode(key)
+        elif key is None or isinstance(key, (bool, int, float)):
+            # Same conversion as json module does for dict keys
+            return self.encode(self.encode(key))
+        else:
+            raise TypeError(
+                "keys must be str, int, float, bool or None, "
+                "not %s" % type(key).__name__
+            )
+
+    def prepare(self, node):
+        prepared = self.nodes.get(node)
+        if prepared is None:
+            names = [field.name for field in node.fields]
+            if len(set(names)) < len(names):
+                # Fields with the same name overwrite each other
+                prepared = False
+            else:
+                prepared = tuple(
+                    (
+                        field,
+                        self.encode_key(field.name) + self.key_separator,
+                        field_getter(field, self.getter)
+                        if field.kind in (FLAT, NESTED, NESTED_ITER)
+                        else None
+                    )
+                    for field in node.fields
+                )
+            self.nodes[node] = prepared
+        return prepared
+
+    def node(self, node, obj):
+        write = self.write
+        if node.iterable:
+            child = node.child
+            if node.page is not None:
+                obj = node.page.paginate(obj)
+            write("[")
+            first = True
+            for sub_obj in obj:
+                if not first:
+                    write(self.item_separator)
+                first = False
+                self.node(child, sub_obj)
+            write("]")
+            return
+
+        fields = self.prepare(node)
+        if fields is False:
+            # Let dict resolve overwritten fields
+            evaluate = self.plan.evaluator(
+                self.getter, self.flat_obj,
+                self.nested_flat_obj, self.nested_iter_obj,
+                node=node
+            )
+            write(self.encode(evaluate(obj)))
+            return
+
+        write("{")
+        first = True
+        for field, key, get in fields:
+            if not first:
+                write(self.item_separator)
+            first = False
+            write(key)
+            self.field(field, get, obj)
+        write("}")
+
+    def field(self, field, get, obj):
+        kind = field.kind
+        if kind == NEW:
+            self.write(self.encode(field.value))
+            return
+        elif kind == EMPTY:
+            self.write("{}")
+            return
+        elif kind == COMPUTED:
+            value = field.value(obj)
+            if field.child is None:
+                self.write(self.encode(value))
+            else:
+                self.node(field.child, value)
+            return
+
+        value = get(obj)
+        if kind == FLAT:
+            if self.flat_obj is not None:
+                value = self.flat_obj(value, obj, field.name)
+            self.write(self.encode(value))
+            return
+
+        hook = self.nested_flat_obj if kind == NESTED else self.nested_iter_obj
+        if hook is not None:
+            value = hook(value, obj, field.name)
+        self.node(field.child, value)
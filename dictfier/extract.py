@@ -0,0 +1,109 @@
+from operator import itemgetter
+
+
+# Maximum number of classes whose extraction is kept per run of fields
+MAX_CLASSES = 64
+
+
+def data_descriptor(value):
+    cls = type(value)
+    return hasattr(cls, "__set__") or hasattr(cls, "__delete__")
+
+
+def class_attribute(cls, name):
+    # Attribute as found on MRO of cls, without calling descriptors
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return vars(klass)[name]
+    return None
+
+
+def namedtuple_extractor(cls, names):
+    # Fields of a namedtuple are its items, read them by index
+    if cls.__getattribute__ is not tuple.__getattribute__:
+        return None
+    mro = cls.__mro__
+    owner = next(klass for klass in mro if "_fields" in vars(klass))
+    subclasses = mro[:mro.index(owner)]
+    fields = tuple(owner._fields)
+    for name in names:
+        if name not in fields or any(
+                name in vars(klass) for klass in subclasses):
+            # Missing or overridden by a subclass
+            return None
+
+    if fields == names:
+        return lambda obj: dict(zip(names, obj))
+
+    get = itemgetter(*[fields.index(name) for name in names])
+    return lambda obj: dict(zip(names, get(obj)))
+
+
+def dataclass_extractor(cls, names):
+    # Instances of dataclasses hold their fields in __dict__ in
+    # declaration order, copy it when query asks for all of them
+    from dataclasses import fields
+
+    if cls.__getattribute__ is not object.__getattribute__:
+        return None
+    if tuple(field.name for field in fields(cls)) != names:
+        return None
+    for name in names:
+        if data_descriptor(class_attribute(cls, name)):
+            # Properties and slots are not stored in __dict__
+            return None
+
+    def extract(obj):
+        values = getattr(obj, "__dict__", None)
+        if values is None or tuple(values) != names:
+            # Attributes were added, deleted or set in other order
+            return None
+        return values.copy()
+    return extract
+
+
+def resolve(cls, names, namedtuples=True):
+    if issubclass(cls, tuple) and hasattr(cls, "_fields"):
+        if not namedtuples:
+            return None
+        return namedtuple_extractor(cls, names)
+    elif hasattr(cls, "__dataclass_fields__"):
+        return dataclass_extractor(cls, names)
+    # Slots and other classes, member descriptors are no faster
+    # than attrgetter so they use the generic path
+    return None
+
+
+class Extractor(object):
+    # Read a run of flat fields from an obj with a function
+    # specialized for its class, returns None for classes which
+    # have no fast path so that fields are read one by one
+    def __init__(self, names, namedtuples=True):
+        self.names = tuple(names)
+        self.namedtuples = namedtuples
+        self.classes = {}
+        # Last class seen and its function, objects of the same class
+        # usually come one after another
+        self.last = (None, None)
+
+    def lookup(self, cls):
+        last_cls, extract = self.last
+        if last_cls is cls:
+            return extract
+
+        try:
+            extract = self.classes[cls]
+        except KeyError:
+            if len(self.classes) >= MAX_CLASSES:
+                self.classes.clear()
+            extract = self.classes[cls] = resolve(
+                cls, self.names, self.namedtuples
+            )
+        self.last = (cls, extract)
+        return extract
+
+    def __call__(self, obj):
+        extract = self.lookup(type(obj))
+        if extract is None:
+            return None
+        return extract(obj)
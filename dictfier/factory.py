@@ -1,10 +1,29 @@
 import sys
+from collections import OrderedDict
+from itertools import islice
+from operator import attrgetter, itemgetter, getitem
 from .exceptions import FormatError
+from .extract import Extractor
+
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
 
 
 if sys.version_info[0] < 3:
-    from inspect import getargspec
-    get_args = getargspec
+    from inspect import getargspec, isfunction, ismethod
+
+    def get_args(function):
+        # Like signature, accept callable objects and leave out self
+        # of bound methods
+        if not isfunction(function) and not ismethod(function):
+            function = function.__call__
+        args = getargspec(function)
+        if ismethod(function) and function.__self__ is not None:
+            return args._replace(args=args.args[1:])
+        return args
     args_prop = "args"
 else:
     from inspect import signature
@@ -23,70 +42,492 @@ class UseObj(object):
         self.query = query
 
 
+class BatchObj(object):
+    # Computed field whose function gets all objs found at its place
+    # in the query at once and returns a sequence of their values
+    def __init__(self, function, query):
+        self.function = function
+        self.query = query
+
+
 class NewField(object):
     def __init__(self, value):
         self.value = value
 
 
-def custom(customr, field_value, parent_obj, field_name):
+# Maximum number of types whose accessors are kept by auto mode
+AUTO_CACHE_SIZE = 1024
+auto_accessors = {}
+
+
+def resolve_accessor(cls):
+    # Mappings are read by item, everything else by attribute
+    if len(auto_accessors) >= AUTO_CACHE_SIZE:
+        auto_accessors.clear()
+    get = getitem if issubclass(cls, Mapping) else getattr
+    auto_accessors[cls] = get
+    return get
+
+
+def auto_get(obj, name):
+    # Read a field the way type of obj needs, deciding once per type
+    get = auto_accessors.get(type(obj))
+    if get is None:
+        get = resolve_accessor(type(obj))
+    return get(obj, name)
+
+
+def auto_getter(name):
+    def get(obj):
+        read = auto_accessors.get(type(obj))
+        if read is None:
+            read = resolve_accessor(type(obj))
+        return read(obj, name)
+    return get
+
+
+# Built-in accessors, as a function reading one field of an obj
+# and a factory of C-level getters used by compiled plans
+ACCESSORS = {
+    "attr": (getattr, attrgetter),
+    "item": (getitem, itemgetter),
+    "auto": (auto_get, auto_getter),
+}
+
+# Getter factory of every built-in accessor function
+GETTERS = dict(ACCESSORS.values())
+
+
+def custom_getter(get):
+    def getter(name):
+        return lambda obj: get(obj, name)
+    return getter
+
+
+class Access(tuple):
+    # Query node whose fields are read with its own accessor instead
+    # of the one chosen by dictfy or filter, for iterable query nodes
+    # the accessor applies to every element
+    def __new__(cls, query, by):
+        self = super(Access, cls).__new__(cls, query)
+        if isinstance(by, str) and by in ACCESSORS:
+            self.get, self.getter = ACCESSORS[by]
+        elif callable(by):
+            self.get, self.getter = by, custom_getter(by)
+        else:
+            raise ValueError(
+                "by must be 'attr', 'item', 'auto' or a callable, "
+                "not '%s'." % by
+            )
+        self.by = by
+        return self
+
+    def __reduce__(self):
+        return (Access, (tuple(self), self.by))
+
+
+class Paged(object):
+    # Iterable query node evaluated against at most limit elements
+    # of its iterable, after skipping the first offset elements
+    def __init__(self, query, limit=None, offset=0):
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            raise ValueError(
+                "limit must be None or a non-negative int, not '%s'." % limit
+            )
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(
+                "offset must be a non-negative int, not '%s'." % offset
+            )
+        self.query = query
+        self.limit = limit
+        self.offset = offset
+
+    def paginate(self, iterable):
+        # Slice sources which support it(lists, ORM querysets) so that
+        # elements out of the page are never fetched, iterate the rest
+        # only as far as the page goes
+        stop = None if self.limit is None else self.offset + self.limit
+        if isinstance(iterable, Sequence) or (
+                hasattr(iterable, "__getitem__") and
+                not isinstance(iterable, Mapping)):
+            try:
+                return iterable[self.offset:stop]
+            except (TypeError, KeyError):
+                # Indexable by keys or positions only(deque)
+                pass
+        return islice(iterable, self.offset, stop)
+
+
+# Maximum number of customizers whose adapters are cached
+HOOK_CACHE_SIZE = 128
+hook_cache = OrderedDict()
+
+
+def adapt_hook(customr):
     # Costomize how object is obtained
     # Pass both field value, parent obj and field name
     # for the purpose of flexibility
     args_length = args_len(customr)
     if args_length == 1:
-        return customr(field_value)
+        return lambda field_value, parent_obj, field_name: (
+            customr(field_value)
+        )
     elif args_length == 2:
-        return customr(field_value, parent_obj)
+        return lambda field_value, parent_obj, field_name: (
+            customr(field_value, parent_obj)
+        )
     elif args_length == 3:
-        return customr(field_value, parent_obj, field_name)
+        return customr
     else:
-        raise TypeError(
-            "%s() takes at most 3 argument (%s given)"
-            %(customr.__name__, args_length)
-        )
+        def invalid(field_value, parent_obj, field_name):
+            raise TypeError(
+                "%s() takes at most 3 argument (%s given)"
+                %(customr.__name__, args_length)
+            )
+        return invalid
+
+
+def bind_hook(customr):
+    # Return an adapter which always accepts field value, parent obj
+    # and field name, inspecting customr only the first time it's seen
+    if customr is None:
+        return None
+
+    try:
+        return hook_cache[customr]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable customr, can't be cached
+        return adapt_hook(customr)
+
+    adapter = adapt_hook(customr)
+    if len(hook_cache) >= HOOK_CACHE_SIZE:
+        hook_cache.popitem(last=False)
+    hook_cache[customr] = adapter
+    return adapter
 
 
-def valid_query(query):
-    flat_or_nested = all(
-        map(
-            lambda node : isinstance(node, (str, dict)),
-            query
-        )
-    )
+def custom(customr, field_value, parent_obj, field_name):
+    return bind_hook(customr)(field_value, parent_obj, field_name)
 
-    iterable = (len(query) <= 1) and all(
-        map(
-            lambda node: isinstance(node, (list, tuple)),
-            query
-        )
-    )
 
-    if flat_or_nested or iterable:
+def valid_query(query):
+    # Flat or nested node has only flat fields and dicts, iterable
+    # node has a single list or tuple
+    for node in query:
+        if not isinstance(node, (str, dict)):
+            break
+    else:
         return True
+    return len(query) == 1 and isinstance(query[0], (list, tuple))
+
+
+# Minimum number of consecutive flat fields read together, shorter
+# runs are cheaper to read one by one
+MIN_RUN = 4
+
+# Minimum number of keys for which output dicts are copied from a
+# template, a new dict holds 5 keys before it has to grow so smaller
+# dicts are as cheap to fill from empty
+MIN_TEMPLATE = 6
+
+
+class FlatRun(object):
+    # Consecutive flat fields of a validated query node, read
+    # together with one getter call or a fast path for class of obj
+    __slots__ = ("names", "extract", "attrs", "items")
+
+    def __init__(self, names):
+        self.names = tuple(names)
+
+    def __getattr__(self, name):
+        # Readers are made the first time they are used, most runs
+        # are only read by attribute or only by item
+        if name == "extract":
+            value = Extractor(self.names)
+        elif name == "attrs":
+            # Read all fields at once
+            value = attrgetter(*self.names)
+        elif name == "items":
+            value = itemgetter(*self.names)
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+
+def add_run(nodes, run):
+    # attrgetter follows dotted names("a.b" reads obj.a.b), runs with
+    # them are read one by one so that names are always literal
+    if len(run) >= MIN_RUN and not any("." in name for name in run):
+        nodes.append(FlatRun(run))
     else:
-        return False
+        nodes.extend(run)
+
+
+class ValidQuery(list):
+    # Query node which has already been validated together with
+    # all of its children, engines don't need to check it again
+    # Function reading fields of this node, None means the default one
+    get = None
+    # Dict with all output keys of this node set to None, copied to
+    # make output dicts presized with keys in order. None if node is
+    # iterable or has too few keys
+    template = None
+    # Paged directive of an iterable node, None means all elements
+    page = None
+    # Whether this node or nodes below it have batchobj fields
+    batched = False
+
+
+def validate(query, validated=None, get=None):
+    # Walk the whole query tree once, validating every node and
+    # copying it into ValidQuery nodes. Queries which contain
+    # themselves(recursive queries) are copied into the same shape.
+    # Used for iterable nodes, whose elements are evaluated many times
+    if isinstance(query, ValidQuery):
+        return query
+
+    if isinstance(query, Access):
+        get = query.get
+    key = id(query) if get is None else (id(query), get)
+    if validated is None:
+        validated = {}
+    elif key in validated:
+        return validated[key]
+
+    if isinstance(query, Paged):
+        nodes = ValidQuery()
+        validated[key] = nodes
+        iterable = validate(query.query, validated, get)
+        if not (len(iterable) == 1 and isinstance(iterable[0], list)):
+            message = "\"%s\" is not an iterable Query node." % (
+                str(query.query)
+            )
+            raise FormatError(message)
+        nodes.extend(iterable)
+        nodes.get = iterable.get
+        nodes.page = query
+        nodes.batched = iterable.batched
+        return nodes
 
+    if not valid_query(query):
+        message = "Invalid Query format on \"%s\" node." % str(query)
+        raise FormatError(message)
+
+    nodes = ValidQuery()
+    if get is not None:
+        nodes.get = get
+    validated[key] = nodes
+    run = []
+    for field in query:
+        if isinstance(field, str):
+            run.append(field)
+            continue
+        if run:
+            add_run(nodes, run)
+            run = []
+
+        if isinstance(field, dict):
+            sub_fields = {}
+            for sub_field_name, sub_field in field.items():
+                if isinstance(sub_field, (list, tuple, Paged)):
+                    sub_field = validate(sub_field, validated)
+                    nodes.batched = nodes.batched or sub_field.batched
+                elif (isinstance(sub_field, UseObj) and
+                        sub_field.query is not None):
+                    sub_field = UseObj(
+                        sub_field.function,
+                        validate(sub_field.query, validated)
+                    )
+                    nodes.batched = nodes.batched or sub_field.query.batched
+                elif isinstance(sub_field, BatchObj):
+                    # Evaluated by plans, see _evaluate
+                    nodes.batched = True
+                sub_fields[sub_field_name] = sub_field
+            nodes.append(sub_fields)
+        elif isinstance(field, (list, tuple)):
+            # Elements of iterable node are read with its accessor
+            field = validate(field, validated, get)
+            nodes.batched = field.batched
+            nodes.append(field)
+        else:
+            nodes.append(field)
+    if run:
+        add_run(nodes, run)
+    nodes.template = key_template(query)
+    return nodes
+
+
+def iterable_query(query):
+    return isinstance(query, Paged) or (
+        len(query) == 1 and isinstance(query[0], (list, tuple))
+    )
+
+
+def check_query(query, validated, checked=None):
+    # Validate the whole tree of a flat or nested query node without
+    # copying nodes evaluated only once, iterable nodes are copied by
+    # validate into validated. Returns whether it has batchobj fields
+    if checked is not None:
+        if id(query) in checked:
+            # Shared or recursive node, its fields were already checked
+            return False
+        checked.add(id(query))
 
-def _dict(
-        obj, query, flat_obj, nested_flat_obj,
-        nested_iter_obj):
-    # Check if the query node is valid
     if not valid_query(query):
         message = "Invalid Query format on \"%s\" node." % str(query)
         raise FormatError(message)
 
+    batched = False
+    for field in query:
+        if not isinstance(field, dict):
+            continue
+        for sub_field in field.values():
+            if isinstance(sub_field, (list, tuple, Paged)):
+                sub_query = sub_field
+            elif isinstance(sub_field, UseObj):
+                sub_query = sub_field.query
+            else:
+                batched = batched or isinstance(sub_field, BatchObj)
+                continue
+            if sub_query is None:
+                continue
+            elif isinstance(sub_query, ValidQuery):
+                sub_batched = sub_query.batched
+            elif iterable_query(sub_query):
+                sub_batched = validate(sub_query, validated).batched
+            else:
+                if checked is None:
+                    checked = set([id(query)])
+                sub_batched = check_query(sub_query, validated, checked)
+            batched = batched or sub_batched
+    return batched
+
+
+def key_template(query):
+    keys = []
+    for field in query:
+        if isinstance(field, str):
+            keys.append(field)
+        elif isinstance(field, dict):
+            keys.extend(field)
+        else:
+            # Iterable node
+            return None
+    if len(keys) < MIN_TEMPLATE:
+        return None
+    template = dict.fromkeys(keys)
+    if len(template) < MIN_TEMPLATE:
+        return None
+    return template
+
+
+def _evaluate(
+        obj, query, get, flat_obj, nested_flat_obj,
+        nested_iter_obj, validated=None):
+    # Engine shared by dictfy and filter, get reads a field of an obj
+    # (getattr or getitem) unless a query node brings its own accessor
+
+    # Validate the whole query once, children are passed down already
+    # validated. Nodes evaluated only once are used as they are,
+    # iterable nodes are copied into ValidQuery nodes(validated holds
+    # them) so that their elements are evaluated with runs and templates
+    if isinstance(query, ValidQuery):
+        validated = None
+    else:
+        iterable = iterable_query(query)
+        if validated is None:
+            validated = {}
+            if iterable:
+                batched = validate(query, validated).batched
+            else:
+                batched = check_query(query, validated)
+            if batched:
+                # Batched fields are resolved level by level by plans
+                from .plan import Plan
+                return Plan(query).evaluate(
+                    obj, GETTERS[get], flat_obj, nested_flat_obj,
+                    nested_iter_obj
+                )
+
+            # Resolve customizers arity once per call
+            if flat_obj is not None:
+                flat_obj = bind_hook(flat_obj)
+            if nested_flat_obj is not None:
+                nested_flat_obj = bind_hook(nested_flat_obj)
+            if nested_iter_obj is not None:
+                nested_iter_obj = bind_hook(nested_iter_obj)
+
+        if iterable:
+            query = validate(query, validated)
+            validated = None
+
+    if validated is None:
+        read = query.get or get
+        template = query.template
+    else:
+        read = query.get if isinstance(query, Access) else get
+        template = None
+    if (read is auto_get and query and
+            not isinstance(query[0], (list, tuple))):
+        # Decide once per obj which fields are read from, runs are
+        # then read by a single call
+        read = auto_accessors.get(type(obj)) or resolve_accessor(type(obj))
+
     # Initial value for flat empty query
-    fields_container = {}
+    if template is None:
+        fields_container = {}
+    else:
+        fields_container = template.copy()
     for field in query:
         if isinstance(field, str):
             # Flat field
-            field_value = getattr(obj, field)
+            field_value = read(obj, field)
 
             if flat_obj is not None:
                 # Costomize how flat obj is obtained
-                field_value = custom(flat_obj, field_value, obj, field)
+                field_value = flat_obj(field_value, obj, field)
+
+            fields_container[field] = field_value
+
+        elif isinstance(field, FlatRun):
+            # Consecutive flat fields
+            values = None
+            if read is getattr and flat_obj is None:
+                cls, extract = field.extract.last
+                if cls is not type(obj):
+                    extract = field.extract.lookup(type(obj))
+                if extract is not None:
+                    values = extract(obj)
+
+            if values is not None:
+                if fields_container:
+                    fields_container.update(values)
+                else:
+                    fields_container = values
+                continue
+
+            names = field.names
+            if read is getattr:
+                values = field.attrs(obj)
+            elif read is getitem:
+                values = field.items(obj)
+            else:
+                # Custom accessor
+                values = [read(obj, name) for name in names]
 
-            fields_container.update({field: field_value})
+            if flat_obj is not None:
+                for name, field_value in zip(names, values):
+                    # Costomize how flat obj is obtained
+                    fields_container[name] = flat_obj(
+                        field_value, obj, name
+                    )
+            elif fields_container:
+                fields_container.update(zip(names, values))
+            else:
+                fields_container = dict(zip(names, values))
 
         elif isinstance(field, dict):
             # Nested or New or Computed field
@@ -96,7 +537,7 @@ def _dict(
                     # New field
 
                     field_value = sub_field.value
-                    fields_container.update({sub_field_name: field_value})
+                    fields_container[sub_field_name] = field_value
                     continue
                 elif isinstance(sub_field, UseObj):
                     # Computed field
@@ -104,105 +545,121 @@ def _dict(
                     computed_value = sub_field.function(obj)
                     if sub_field.query is None:
                         # Field has no child
-                        fields_container.update(
-                            {sub_field_name: computed_value}
-                        )
+                        fields_container[sub_field_name] = computed_value
                         continue
                     else:
                         # Field has a child,
                         # Create a new child and append it to it's parent
-                        sub_child = _dict(
+                        sub_child = _evaluate(
                             computed_value,
                             sub_field.query,
+                            get,
                             flat_obj,
                             nested_flat_obj,
-                            nested_iter_obj
+                            nested_iter_obj,
+                            validated
                         )
-                        fields_container.update({sub_field_name: sub_child})
+                        fields_container[sub_field_name] = sub_child
                         continue
                 elif (isinstance(sub_field, (list, tuple)) and
                         len(sub_field) == 0):
                         # Nested flat empty query
 
-                    fields_container.update({sub_field_name: {}})
+                    fields_container[sub_field_name] = {}
                     continue
                 elif (isinstance(sub_field, (list, tuple)) and
                         len(sub_field) == 1 and
-                        isinstance(sub_field[0], (list, tuple))):
+                        isinstance(sub_field[0], (list, tuple))) or (
+                        validated is not None and
+                        isinstance(sub_field, Paged)):
                         # Nested iterable field
 
-                    obj_field = getattr(obj, sub_field_name)
+                    if validated is not None:
+                        # Copied by check_query
+                        sub_field = validate(sub_field, validated)
+
+                    obj_field = read(obj, sub_field_name)
                     if nested_iter_obj is not None:
                         # Costomize how nested iterable obj is obtained
-                        obj_field = custom(
-                            nested_iter_obj,
+                        obj_field = nested_iter_obj(
                             obj_field,
                             obj,
                             sub_field_name
                         )
 
+                    if sub_field.page is not None:
+                        # Only elements of the page
+                        obj_field = sub_field.page.paginate(obj_field)
+
                     child_container = []
                     for sub_obj in obj_field:
-                        # dictfy all objects on iterable object
-                        child = _dict(
+                        # Convert all objects on iterable object
+                        child = _evaluate(
                             sub_obj,
                             sub_field[0],
+                            get,
                             flat_obj,
                             nested_flat_obj,
-                            nested_iter_obj
+                            nested_iter_obj,
+                            validated
                         )
                         child_container.append(child)
 
-                    fields_container.update(
-                        {sub_field_name: child_container}
-                    )
+                    fields_container[sub_field_name] = child_container
                     continue
 
                 elif (isinstance(sub_field, (list, tuple)) and
                         len(sub_field) > 0):
                         # Nested flat field
 
-                    obj_field = getattr(obj, sub_field_name)
+                    obj_field = read(obj, sub_field_name)
                     if nested_flat_obj is not None:
                         # Costomize how nested flat obj is obtained
-                        obj_field = custom(
-                            nested_flat_obj,
+                        obj_field = nested_flat_obj(
                             obj_field,
                             obj,
                             sub_field_name
                         )
 
-                    child = _dict(
+                    child = _evaluate(
                         obj_field,
                         sub_field,
+                        get,
                         flat_obj,
                         nested_flat_obj,
-                        nested_iter_obj
+                        nested_iter_obj,
+                        validated
                     )
-                    fields_container.update({sub_field_name: child})
+                    fields_container[sub_field_name] = child
                 else:
                     # Ivalid Assignment of value to a field
                     message = (
                         "'%s' value must be of type "
                         "NewField or UseObj, not '%s'. "
-                        "Refer to 'useobj', 'objfield' or 'newfield' "
-                        "APIs for more details."
+                        "Refer to 'useobj', 'objfield', 'dictfield' or "
+                        "'newfield' APIs for more details."
                     ) % (str(sub_field_name), type(sub_field).__name__)
                     raise TypeError(message)
 
         elif isinstance(field, (list, tuple)):
             # Iterable field
 
+            if query.page is not None:
+                # Only elements of the page
+                obj = query.page.paginate(obj)
+
             # Initial value for iterable empty query
             fields_container = []
             for sub_obj in obj:
-                # dictfy all objects on iterable object
-                child = _dict(
+                # Convert all objects on iterable object
+                child = _evaluate(
                     sub_obj,
                     field,
+                    get,
                     flat_obj,
                     nested_flat_obj,
-                    nested_iter_obj
+                    nested_iter_obj,
+                    validated
                 )
                 fields_container.append(child)
         else:
@@ -215,3 +672,16 @@ def _dict(
             raise FormatError(message)
 
     return fields_container
+
+
+def _dict(
+        obj, query, flat_obj, nested_flat_obj,
+        nested_iter_obj):
+    return _evaluate(
+        obj,
+        query,
+        getattr,
+        flat_obj,
+        nested_flat_obj,
+        nested_iter_obj
+    )
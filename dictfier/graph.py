@@ -0,0 +1,57 @@
+from .plan import field_value
+
+
+REF = "$ref"
+
+
+def pointer(path, name):
+    # Extend JSON pointer path with a field name or index
+    name = str(name).replace("~", "~0").replace("/", "~1")
+    return "%s/%s" % (path, name)
+
+
+class Graph(object):
+    # Evaluate plan nodes tracking objects already emitted, an object
+    # reached again with the same query node is emitted as a reference
+    # to the place where it was emitted first. This stops cycles and
+    # converts every object at most once per query node
+    def __init__(self, context):
+        self.context = context
+        self.getters = {}
+        self.emitted = {}
+
+    def node(self, node, obj, path):
+        if node.iterable:
+            child = node.child
+            if node.page is not None:
+                obj = node.page.paginate(obj)
+            return [
+                self.node(child, sub_obj, pointer(path, index))
+                for index, sub_obj in enumerate(obj)
+            ]
+
+        key = (id(obj), node)
+        entry = self.emitted.get(key)
+        if entry is not None:
+            return {REF: entry[1]}
+        # Keep obj alive so that its id is not reused
+        self.emitted[key] = (obj, path)
+
+        context = self.context
+        fields_container = {}
+        for field in node.fields:
+            value = field_value(
+                field, context.getter, obj, context.flat_obj,
+                context.nested_flat_obj, context.nested_iter_obj,
+                self.getters
+            )
+            if field.child is not None:
+                value = self.node(
+                    field.child, value, pointer(path, field.name)
+                )
+            fields_container[field.name] = value
+        return fields_container
+
+
+def evaluate(node, obj, context):
+    return Graph(context).node(node, obj, "#")
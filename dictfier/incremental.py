@@ -0,0 +1,190 @@
+import re
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+from .exceptions import FormatError
+from .factory import bind_hook
+from .plan import COMPUTED, field_value
+
+
+INDEX = re.compile(r"^-?[0-9]+$")
+
+def split(path):
+    # Field names of a dirty path, "course.code" or ("course", "code"),
+    # empty paths("", "." or ()) refer to the root
+    if isinstance(path, str):
+        return [name for name in path.split(".") if name]
+    return list(path)
+
+
+def merge(first, second):
+    # Union of two dirty trees, None means the whole subtree is dirty
+    if first is None or second is None:
+        return None
+    merged = dict(first)
+    for key, subtree in second.items():
+        if key in merged:
+            merged[key] = merge(merged[key], subtree)
+        else:
+            merged[key] = subtree
+    return merged
+
+
+def dirty_tree(paths):
+    # Turn dirty paths into a tree of names whose leaves are None
+    tree = {}
+    for path in paths:
+        names = split(path)
+        if not names:
+            # Root itself is dirty
+            return None
+        branch = None
+        for name in reversed(names):
+            branch = {name: branch}
+        tree = merge(tree, branch)
+    return tree
+
+
+def index_of(key):
+    # Position of an element an iterable node's dirty key refers to,
+    # ints and strings of ints, negative ones count from the end
+    if isinstance(key, int):
+        return key
+    if isinstance(key, str) and INDEX.match(key):
+        return int(key)
+    return None
+
+
+class Refresh(object):
+    # Evaluate plan nodes again only along dirty paths, taking
+    # everything else from the previous result. Dicts and lists on
+    # dirty paths are copied, the previous result is never modified
+    def __init__(self, plan, getter, flat_obj, nested_flat_obj,
+                 nested_iter_obj):
+        self.plan = plan
+        self.getter = getter
+        self.hooks = (flat_obj, nested_flat_obj, nested_iter_obj)
+        self.bound_hooks = (
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj)
+        )
+        self.evaluators = {}
+        self.prepared = {}
+
+    def evaluate(self, node, obj):
+        evaluate = self.evaluators.get(node)
+        if evaluate is None:
+            evaluate = self.evaluators[node] = self.plan.evaluator(
+                self.getter, *self.hooks, node=node
+            )
+        return evaluate(obj)
+
+    def fields(self, node):
+        # Fields by name, a field overwrites earlier fields with its
+        # name, and names of computed fields among them
+        prepared = self.prepared.get(node)
+        if prepared is None:
+            fields = {}
+            for field in node.fields:
+                fields[field.name] = field
+            computed = [
+                name for name, field in fields.items()
+                if field.kind == COMPUTED
+            ]
+            prepared = self.prepared[node] = (fields, computed)
+        return prepared
+
+    def node(self, node, previous, obj, dirty):
+        if dirty is None:
+            return self.evaluate(node, obj)
+        elif node.iterable:
+            if not isinstance(previous, list):
+                return self.evaluate(node, obj)
+            elif not dirty:
+                return previous
+            return self.iterable(node, previous, obj, dirty)
+        elif not isinstance(previous, dict):
+            return self.evaluate(node, obj)
+        elif not dirty:
+            return previous
+
+        fields, computed = self.fields(node)
+        result = dict(previous)
+        if computed:
+            # Computed fields can read any attribute, so they are
+            # evaluated again on every node along a dirty path
+            dirty = dict(dirty)
+            for name in computed:
+                dirty[name] = None
+        for name, subtree in dirty.items():
+            field = fields.get(name)
+            if field is None:
+                message = "There is no field named '%s' on \"%s\" node." % (
+                    str(name), str(node.query)
+                )
+                raise FormatError(message)
+
+            value = field_value(field, self.getter, obj, *self.bound_hooks)
+            if field.child is not None:
+                value = self.node(
+                    field.child, previous.get(name), value, subtree
+                )
+            result[name] = value
+        return result
+
+    def iterable(self, node, previous, obj, dirty):
+        if node.page is not None:
+            obj = node.page.paginate(obj)
+        if not isinstance(obj, Sequence):
+            obj = list(obj)
+        if len(obj) != len(previous):
+            # Elements were added or removed
+            return [self.evaluate(node.child, sub_obj) for sub_obj in obj]
+
+        # Names are dirty on all elements, indexes on a single element
+        common = {}
+        elements = {}
+        for key, subtree in dirty.items():
+            index = index_of(key)
+            if index is None:
+                common = merge(common, {key: subtree})
+            else:
+                if index < 0:
+                    index += len(obj)
+                if not 0 <= index < len(obj):
+                    raise IndexError(
+                        "There is no element %s on \"%s\" node." % (
+                            key, str(node.query)
+                        )
+                    )
+                elements[index] = merge(
+                    elements.get(index, {}), subtree
+                )
+
+        result = list(previous)
+        child = node.child
+        if common:
+            for index, sub_obj in enumerate(obj):
+                result[index] = self.node(
+                    child, previous[index], sub_obj,
+                    merge(common, elements.get(index, {}))
+                )
+            return result
+
+        for index, subtree in elements.items():
+            result[index] = self.node(
+                child, previous[index], obj[index], subtree
+            )
+        return result
+
+
+def refresh(plan, previous, obj, dirty, getter, flat_obj=None,
+            nested_flat_obj=None, nested_iter_obj=None):
+    refresher = Refresh(
+        plan, getter, flat_obj, nested_flat_obj, nested_iter_obj
+    )
+    return refresher.node(plan.root, previous, obj, dirty_tree(dirty))
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
+
+from .plan import field_value
+
+
+class Lazy(object):
+    # Evaluates fields on demand, shared by all lazy containers
+    # created during one call
+    def __init__(self, context):
+        self.context = context
+        self.prepared = {}
+        self.getters = {}
+
+    def fields(self, node):
+        # Fields by name in query order, a field overwrites earlier
+        # fields with its name
+        fields = self.prepared.get(node)
+        if fields is None:
+            fields = self.prepared[node] = OrderedDict()
+            for field in node.fields:
+                fields[field.name] = field
+        return fields
+
+    def node(self, node, obj):
+        if node.iterable:
+            if node.page is not None:
+                obj = node.page.paginate(obj)
+            return LazyList(self, node.child, obj)
+        return LazyDict(self, node, obj)
+
+    def field(self, field, obj):
+        context = self.context
+        value = field_value(
+            field, context.getter, obj, context.flat_obj,
+            context.nested_flat_obj, context.nested_iter_obj,
+            self.getters
+        )
+        if field.child is not None:
+            value = self.node(field.child, value)
+        return value
+
+
+def materialize(value):
+    if isinstance(value, (LazyDict, LazyList)):
+        return value.materialize()
+    return value
+
+
+class LazyDict(Mapping):
+    # Read-only mapping whose values are computed on first access
+    def __init__(self, lazy, node, obj):
+        self._lazy = lazy
+        self._fields = lazy.fields(node)
+        self._obj = obj
+        self._values = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+
+        value = self._lazy.field(self._fields[key], self._obj)
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def materialize(self):
+        # Plain dict with all values computed
+        return dict(
+            (key, materialize(self[key])) for key in self._fields
+        )
+
+
+class LazyList(Sequence):
+    # Read-only sequence of lazy dicts, the source iterable is
+    # only iterated when the sequence is used for the first time
+    def __init__(self, lazy, node, obj):
+        self._lazy = lazy
+        self._node = node
+        self._obj = obj
+        self._objs = None
+        self._values = {}
+
+    def _sub_objs(self):
+        if self._objs is None:
+            self._objs = list(self._obj)
+            self._obj = None
+        return self._objs
+
+    def __getitem__(self, index):
+        sub_objs = self._sub_objs()
+        if isinstance(index, slice):
+            return [
+                self[position]
+                for position in range(*index.indices(len(sub_objs)))
+            ]
+
+        if index < 0:
+            index += len(sub_objs)
+        try:
+            return self._values[index]
+        except KeyError:
+            pass
+
+        value = self._lazy.node(self._node, sub_objs[index])
+        self._values[index] = value
+        return value
+
+    def __len__(self):
+        return len(self._sub_objs())
+
+    def __eq__(self, other):
+        if not isinstance(other, (Sequence, LazyList)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def materialize(self):
+        # Plain list with all elements computed
+        return [materialize(value) for value in self]
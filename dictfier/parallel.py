@@ -0,0 +1,75 @@
+from itertools import chain, islice, repeat
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    # Python 2 has no concurrent.futures, always run in process
+    ProcessPoolExecutor = None
+
+from .plan import Plan
+
+
+# Number of elements sent to a worker at once
+CHUNK_SIZE = 1000
+
+
+def chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_chunk(plan, mode, chunk, flat_obj, nested_flat_obj,
+              nested_iter_obj, options):
+    # Executed in a worker process
+    return getattr(plan, mode)(
+        chunk, flat_obj, nested_flat_obj, nested_iter_obj, **options
+    )
+
+
+def evaluate(plan, mode, obj, workers, chunk_size=None, flat_obj=None,
+             nested_flat_obj=None, nested_iter_obj=None, **options):
+    # Split root iterable into chunks and evaluate them in a process pool,
+    # plan, config hooks and elements must be picklable
+    if options.get("refs"):
+        # References of each chunk would point into the chunk
+        raise ValueError("refs are not supported with workers.")
+    if options.get("tracer") is not None:
+        # Workers would send events to copies of the tracer
+        raise ValueError("tracer is not supported with workers.")
+
+    hooks = (flat_obj, nested_flat_obj, nested_iter_obj)
+    if (not plan.root.iterable or ProcessPoolExecutor is None or
+            not workers or workers < 2):
+        return getattr(plan, mode)(obj, *hooks, **options)
+
+    if plan.root.page is not None:
+        # Chunks are parts of the page, evaluated with the query
+        # the page is taken from
+        obj = plan.root.page.paginate(obj)
+        plan = Plan(plan.root.page.query, plan.codegen)
+
+    chunk_size = chunk_size or CHUNK_SIZE
+    parts = chunks(obj, chunk_size)
+    head = list(islice(parts, workers))
+    if sum(map(len, head)) < workers * chunk_size:
+        # Less than a full chunk per worker, too small for pool
+        # overhead to pay off
+        return getattr(plan, mode)(
+            list(chain.from_iterable(head)), *hooks, **options
+        )
+
+    result = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            run_chunk,
+            repeat(plan), repeat(mode), chain(head, parts),
+            repeat(flat_obj), repeat(nested_flat_obj),
+            repeat(nested_iter_obj), repeat(options)
+        )
+        for part in results:
+            result.extend(part)
+    return result
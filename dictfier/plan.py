@@ -0,0 +1,823 @@
+from operator import attrgetter, itemgetter
+
+from .exceptions import FormatError
+from .extract import Extractor
+from .rows import row_type, row_fields, schema
+from .factory import (
+    UseObj, BatchObj, NewField, Access, Paged, bind_hook, valid_query,
+    auto_getter, auto_accessors, resolve_accessor, MIN_RUN, MIN_TEMPLATE
+)
+
+
+# Kinds of fields found on a flat or nested query node
+FLAT = 0         # "name"
+NEW = 1          # {"name": newfield(value)}
+COMPUTED = 2     # {"name": useobj(function, query)}
+EMPTY = 3        # {"name": []}
+NESTED = 4       # {"name": ["field", ...]}
+NESTED_ITER = 5  # {"name": [["field", ...]]}
+
+# Maximum number of hook combinations whose evaluators are kept per plan
+MAX_BOUND = 32
+
+# Getters used by each conversion mode
+MODES = {
+    "dictfy": attrgetter,
+    "filter": itemgetter,
+    "auto": auto_getter,
+}
+
+
+def mode_getter(mode):
+    try:
+        return MODES[mode]
+    except (KeyError, TypeError):
+        raise ValueError(
+            "mode must be 'dictfy', 'filter' or 'auto', not '%s'." % (mode,)
+        )
+
+
+class Field(object):
+    __slots__ = ("kind", "name", "value", "child", "access", "batch")
+
+    def __init__(self, kind, name, value=None, child=None, access=None,
+                 batch=None):
+        self.kind = kind
+        self.name = name
+        # NewField value or UseObj function
+        self.value = value
+        # Lowered query node applied to the field value
+        self.child = child
+        # Getter factory reading the field, None means the one
+        # chosen by dictfy or filter
+        self.access = access
+        # BatchObj function of a computed field, which value calls
+        # with a single obj where objs are not collected
+        self.batch = batch
+
+
+class ObjNode(object):
+    # Flat or nested query node, evaluates to a dict
+    __slots__ = ("fields", "query")
+    iterable = False
+
+    def __init__(self, fields, query):
+        self.fields = fields
+        self.query = query
+
+
+class IterNode(object):
+    # Iterable query node, evaluates to a list
+    __slots__ = ("child", "query", "page")
+    iterable = True
+
+    def __init__(self, child, query, page=None):
+        self.child = child
+        self.query = query
+        # Paged directive limiting elements evaluated, None means all
+        self.page = page
+
+
+def lower_field(name, sub_field, lowered, access=None):
+    if isinstance(sub_field, NewField):
+        return Field(NEW, name, value=sub_field.value)
+    elif isinstance(sub_field, UseObj):
+        child = None
+        if sub_field.query is not None:
+            child = lower(sub_field.query, lowered)
+        return Field(COMPUTED, name, value=sub_field.function, child=child)
+    elif isinstance(sub_field, BatchObj):
+        child = None
+        if sub_field.query is not None:
+            child = lower(sub_field.query, lowered)
+        function = sub_field.function
+        return Field(
+            COMPUTED, name, value=lambda obj: function([obj])[0],
+            child=child, batch=function
+        )
+    elif isinstance(sub_field, (list, tuple)) and len(sub_field) == 0:
+        return Field(EMPTY, name)
+    elif isinstance(sub_field, Paged) or (
+            isinstance(sub_field, (list, tuple)) and
+            len(sub_field) == 1 and
+            isinstance(sub_field[0], (list, tuple))):
+        return Field(
+            NESTED_ITER, name, child=lower(sub_field, lowered), access=access
+        )
+    elif isinstance(sub_field, (list, tuple)):
+        return Field(
+            NESTED, name, child=lower(sub_field, lowered), access=access
+        )
+    else:
+        # Ivalid Assignment of value to a field
+        message = (
+            "'%s' value must be of type "
+            "NewField or UseObj, not '%s'. "
+            "Refer to 'useobj', 'objfield', 'dictfield' or 'newfield' "
+            "APIs for more details."
+        ) % (str(name), type(sub_field).__name__)
+        raise TypeError(message)
+
+
+def lower(query, lowered=None, access=None):
+    # Validate query node and turn it into a tree of plan nodes,
+    # a query which contains itself is lowered into a cyclic plan
+    if isinstance(query, Access):
+        access = query.getter
+    key = id(query) if access is None else (id(query), access)
+    if lowered is None:
+        lowered = {}
+    elif key in lowered:
+        return lowered[key]
+
+    if isinstance(query, Paged):
+        node = IterNode(None, query, page=query)
+        lowered[key] = node
+        iterable = lower(query.query, lowered, access)
+        if not iterable.iterable:
+            message = "\"%s\" is not an iterable Query node." % (
+                str(query.query)
+            )
+            raise FormatError(message)
+        node.child = iterable.child
+        return node
+
+    if not valid_query(query):
+        message = "Invalid Query format on \"%s\" node." % str(query)
+        raise FormatError(message)
+
+    nodes = list(query)
+    if len(nodes) == 1 and isinstance(nodes[0], (list, tuple)):
+        node = IterNode(None, query)
+        lowered[key] = node
+        # Elements of iterable node are read with its accessor
+        node.child = lower(nodes[0], lowered, access)
+        return node
+
+    node = ObjNode((), query)
+    lowered[key] = node
+    fields = []
+    for field in nodes:
+        if isinstance(field, str):
+            fields.append(Field(FLAT, field, access=access))
+        else:
+            for sub_field_name, sub_field in field.items():
+                fields.append(
+                    lower_field(sub_field_name, sub_field, lowered, access)
+                )
+    node.fields = tuple(fields)
+    return node
+
+
+def children(node):
+    if node.iterable:
+        return [node.child]
+    return [field.child for field in node.fields if field.child is not None]
+
+
+def batched_nodes(root):
+    # Nodes which have batchobj fields or reach nodes which do
+    nodes = []
+    seen = set([root])
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        for child in children(node):
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+
+    batched = set(
+        node for node in nodes
+        if not node.iterable and
+        any(field.batch is not None for field in node.fields)
+    )
+    changed = bool(batched)
+    while changed:
+        changed = False
+        for node in nodes:
+            if node not in batched and any(
+                    child in batched for child in children(node)):
+                batched.add(node)
+                changed = True
+    return batched
+
+
+class Memo(dict):
+    # Results of flat or nested nodes already evaluated during one call,
+    # keyed by (id(obj), node)
+    def __init__(self, copy=False):
+        super(Memo, self).__init__()
+        self.copy = copy
+
+
+class Context(object):
+    # Everything besides plan nodes which evaluators are bound with
+    def __init__(self, getter, flat_obj=None, nested_flat_obj=None,
+                 nested_iter_obj=None, memo=None, tracer=None, rows=None):
+        self.getter = getter
+        self.flat_obj = flat_obj
+        self.nested_flat_obj = nested_flat_obj
+        self.nested_iter_obj = nested_iter_obj
+        self.memo = memo
+        self.tracer = tracer
+        # Evaluate flat or nested nodes to tuples(True) or
+        # namedtuples("named") instead of dicts
+        self.rows = rows
+        # Field names from the root to the field being traced
+        self.path = []
+        # Functions already bound for plan nodes
+        self.bound = {}
+
+
+def name_getter(name, getter):
+    # Function reading field name from its parent obj. attrgetter
+    # follows dotted names("a.b" reads obj.a.b), field names are
+    # always read literally like getattr does
+    if getter is attrgetter and isinstance(name, str) and "." in name:
+        return lambda obj: getattr(obj, name)
+    return getter(name)
+
+
+def field_getter(field, getter):
+    # Function reading field from its parent obj
+    return name_getter(field.name, field.access or getter)
+
+
+def node_getter(field, getter, auto):
+    # Getter factory of field on a node whose auto accessor was
+    # resolved to auto(attrgetter or itemgetter), None if it wasn't
+    getter = field.access or getter
+    if getter is auto_getter and auto is not None:
+        return auto
+    return getter
+
+
+def bind_field(field, context, auto=None):
+    # Return a function which computes field value from its parent obj
+    name = field.name
+    if field.kind == FLAT:
+        get = name_getter(name, node_getter(field, context.getter, auto))
+        flat_obj = context.flat_obj
+        if flat_obj is None:
+            return get
+
+        def flat(obj):
+            return flat_obj(get(obj), obj, name)
+        return flat
+
+    elif field.kind == NEW:
+        value = field.value
+        return lambda obj: value
+
+    elif field.kind == EMPTY:
+        return lambda obj: {}
+
+    elif field.kind == COMPUTED:
+        function = field.value
+        if field.child is None:
+            return function
+
+        child = bind(field.child, context)
+        return lambda obj: child(function(obj))
+
+    # Nested flat or nested iterable field
+    get = name_getter(name, node_getter(field, context.getter, auto))
+    if field.kind == NESTED:
+        hook = context.nested_flat_obj
+    else:
+        hook = context.nested_iter_obj
+    child = bind(field.child, context)
+    if hook is None:
+        return lambda obj: child(get(obj))
+
+    def nested(obj):
+        return child(hook(get(obj), obj, name))
+    return nested
+
+
+def memoize(node, evaluate, memo):
+    # Reuse result of a node already evaluated against the same obj
+    copy = memo.copy
+
+    def memoized(obj):
+        key = (id(obj), node)
+        entry = memo.get(key)
+        if entry is None:
+            result = evaluate(obj)
+            # Keep obj alive so that its id is not reused
+            memo[key] = (obj, result)
+            return result
+        elif copy:
+            return dict(entry[1])
+        return entry[1]
+    return memoized
+
+
+def bind(node, context):
+    # Turn plan node into a function which evaluates it against an obj
+    evaluate = context.bound.get(node)
+    if evaluate is not None:
+        return evaluate
+
+    # Nodes reached again while their own children are being bound
+    # (cyclic plans) go through this forwarding function
+    bound = []
+    context.bound[node] = lambda obj: bound[0](obj)
+    evaluate = bind_node(node, context)
+    bound.append(evaluate)
+    context.bound[node] = evaluate
+    return evaluate
+
+
+def bind_row(node, steps, context):
+    # Evaluate flat or nested node to a row of field values
+    fields = row_fields(node)
+    cls = row_type(fields) if context.rows == "named" else tuple
+    new = tuple.__new__
+
+    if len(fields) == len(steps):
+        functions = tuple(step for name, step in steps)
+
+        def row(obj):
+            return new(cls, [step(obj) for step in functions])
+        return row
+
+    # Fields with the same name overwrite each other
+    positions = dict((name, index) for index, name in enumerate(fields))
+    indexed = tuple((positions[name], step) for name, step in steps)
+    size = len(fields)
+
+    def overwritten_row(obj):
+        values = [None] * size
+        for index, step in indexed:
+            values[index] = step(obj)
+        return new(cls, values)
+    return overwritten_row
+
+
+def leading_run(node, context, auto=None):
+    # Number of flat fields read by attribute without hooks which
+    # the node starts with
+    if (context.flat_obj is not None or context.tracer is not None or
+            context.rows):
+        return 0
+    count = 0
+    for field in node.fields:
+        if (field.kind != FLAT or
+                node_getter(field, context.getter, auto) is not attrgetter):
+            break
+        count += 1
+    return count
+
+
+def reads_auto(node, getter):
+    # Whether a field of flat or nested node is read by auto accessor
+    for field in node.fields:
+        if (field.kind in (FLAT, NESTED, NESTED_ITER) and
+                (field.access or getter) is auto_getter):
+            return True
+    return False
+
+
+def bind_node(node, context):
+    if node.iterable:
+        child = bind(node.child, context)
+        if node.page is not None:
+            paginate = node.page.paginate
+
+            def paged(obj):
+                return [child(sub_obj) for sub_obj in paginate(obj)]
+            return paged
+
+        def iterable(obj):
+            return [child(sub_obj) for sub_obj in obj]
+        return iterable
+
+    if reads_auto(node, context.getter):
+        # Auto accessor is resolved once per obj rather than per field,
+        # the node is bound for both accessors it can resolve to
+        by_attr = bind_fields(node, context, attrgetter)
+        by_item = bind_fields(node, context, itemgetter)
+
+        def flat_or_nested(obj):
+            read = auto_accessors.get(type(obj))
+            if read is None:
+                read = resolve_accessor(type(obj))
+            if read is getattr:
+                return by_attr(obj)
+            return by_item(obj)
+    else:
+        flat_or_nested = bind_fields(node, context)
+
+    if context.memo is not None:
+        return memoize(node, flat_or_nested, context.memo)
+    return flat_or_nested
+
+
+def bind_fields(node, context, auto=None):
+    # Evaluate flat or nested node to a dict(or a row), auto is the
+    # getter factory fields read by auto accessor use on this obj
+    steps = tuple(
+        (field.name, bind_field(field, context, auto))
+        for field in node.fields
+    )
+    if context.tracer is not None:
+        from .trace import traced
+        steps = tuple(
+            (name, traced(name, step, context.tracer, context.path))
+            for name, step in steps
+        )
+
+    # Output dicts with many keys are copied from a template which
+    # already has all keys, so they are never resized while filled
+    keys = row_fields(node)
+    template = None
+    if len(keys) >= MIN_TEMPLATE:
+        template = dict.fromkeys(keys)
+
+    count = leading_run(node, context, auto)
+    if context.rows:
+        flat_or_nested = bind_row(node, steps, context)
+    elif count >= MIN_RUN:
+        # Classes with a fast path get all leading flat fields at once,
+        # attrgetter reads namedtuple fields as fast as indexing does
+        extractor = Extractor(
+            [field.name for field in node.fields[:count]],
+            namedtuples=False
+        )
+        rest = steps[count:]
+
+        def flat_or_nested(obj):
+            cls, extract = extractor.last
+            if cls is not type(obj):
+                extract = extractor.lookup(type(obj))
+            if extract is not None:
+                fields_container = extract(obj)
+                if fields_container is not None:
+                    for name, step in rest:
+                        fields_container[name] = step(obj)
+                    return fields_container
+
+            if template is None:
+                fields_container = {}
+            else:
+                fields_container = template.copy()
+            for name, step in steps:
+                fields_container[name] = step(obj)
+            return fields_container
+    elif template is not None:
+        def flat_or_nested(obj):
+            fields_container = template.copy()
+            for name, step in steps:
+                fields_container[name] = step(obj)
+            return fields_container
+    else:
+        def flat_or_nested(obj):
+            fields_container = {}
+            for name, step in steps:
+                fields_container[name] = step(obj)
+            return fields_container
+    return flat_or_nested
+
+
+def field_value(field, getter, obj, flat_obj, nested_flat_obj,
+                nested_iter_obj, getters=None):
+    # Value of a field before its child query is applied, getters
+    # keeps functions reading fields for callers which read the same
+    # fields many times
+    if field.kind == NEW:
+        return field.value
+    elif field.kind == EMPTY:
+        return {}
+    elif field.kind == COMPUTED:
+        return field.value(obj)
+
+    if getters is None:
+        get = field_getter(field, getter)
+    else:
+        get = getters.get(field)
+        if get is None:
+            get = getters[field] = field_getter(field, getter)
+    value = get(obj)
+    if field.kind == FLAT:
+        hook = flat_obj
+    elif field.kind == NESTED:
+        hook = nested_flat_obj
+    else:
+        hook = nested_iter_obj
+
+    if hook is not None:
+        value = hook(value, obj, field.name)
+    return value
+
+
+def find_field(node, name):
+    # Field named name on a flat or nested node
+    if not node.iterable:
+        for field in node.fields:
+            if field.name == name and field.child is not None:
+                return field
+
+    message = "There is no nested field named '%s' on \"%s\" node." % (
+        str(name), str(node.query)
+    )
+    raise FormatError(message)
+
+
+class Plan(object):
+    def __init__(self, query, codegen=False):
+        self.query = query
+        self.root = lower(query)
+        self.codegen = codegen
+        self.batched = batched_nodes(self.root)
+        self._bound = {}
+
+    def __reduce__(self):
+        # Send only the query to other processes, it's lowered again there
+        return (Plan, (self.query, self.codegen))
+
+    def evaluator(self, getter, flat_obj=None, nested_flat_obj=None,
+                  nested_iter_obj=None, node=None, memo=None, tracer=None,
+                  rows=None):
+        if node is None:
+            node = self.root
+
+        # Customizers arity is resolved once per plan
+        context = Context(
+            getter,
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj),
+            rows=rows
+        )
+        if memo or tracer is not None:
+            # Memo and traced path live for a single call,
+            # evaluator can't be cached
+            if memo:
+                # Rows are immutable, they never need to be copied
+                context.memo = Memo(copy=memo == "copy" and not rows)
+            if tracer is None:
+                return bind(node, context)
+
+            from .trace import traced
+            context.tracer = tracer
+            return traced(None, bind(node, context), tracer, context.path)
+
+        key = (getter, flat_obj, nested_flat_obj, nested_iter_obj, node, rows)
+        try:
+            evaluate = self._bound.get(key)
+        except TypeError:
+            # Unhashable customizer, evaluator can't be cached
+            key = evaluate = None
+        if evaluate is None:
+            build = bind
+            if self.codegen and not rows:
+                from .codegen import generate as build
+            evaluate = build(node, context)
+            if key is not None and len(self._bound) < MAX_BOUND:
+                self._bound[key] = evaluate
+        return evaluate
+
+    def evaluate(self, obj, getter, flat_obj=None, nested_flat_obj=None,
+                 nested_iter_obj=None, memo=None, refs=False, engine=None,
+                 tracer=None, rows=None):
+        if memo not in (None, False, True, "copy"):
+            raise ValueError(
+                "memo must be None, False, True or 'copy', not '%s'." % (
+                    memo,
+                )
+            )
+        if rows not in (None, False, True, "named"):
+            raise ValueError(
+                "rows must be None, False, True or 'named', not '%s'." % (
+                    rows,
+                )
+            )
+        if rows and (refs or engine == "stack"):
+            raise ValueError(
+                "rows are not supported with 'refs' or 'stack' engine."
+            )
+        if tracer is not None and (refs or engine == "stack"):
+            raise ValueError(
+                "tracer is not supported with 'refs' or 'stack' engine."
+            )
+        if refs or engine == "stack":
+            if refs:
+                from .graph import evaluate
+            else:
+                from .stack import evaluate
+            context = Context(
+                getter,
+                bind_hook(flat_obj),
+                bind_hook(nested_flat_obj),
+                bind_hook(nested_iter_obj)
+            )
+            if memo and not refs:
+                # References already convert every object only once
+                context.memo = Memo(copy=memo == "copy")
+            return evaluate(self.root, obj, context)
+        elif engine not in (None, "recursive"):
+            raise ValueError(
+                "engine must be 'recursive' or 'stack', not '%s'." % engine
+            )
+
+        if self.batched and not memo and tracer is None and not rows:
+            # Objs of batchobj fields are collected level by level,
+            # other engines call batchobj functions with a single obj
+            from .batch import evaluate
+            return evaluate(
+                self, obj, getter, flat_obj, nested_flat_obj, nested_iter_obj
+            )
+
+        evaluate = self.evaluator(
+            getter, flat_obj, nested_flat_obj, nested_iter_obj,
+            memo=memo, tracer=tracer, rows=rows
+        )
+        return evaluate(obj)
+
+    def dictfy(self, obj, flat_obj=None, nested_flat_obj=None,
+               nested_iter_obj=None, memo=None, refs=False, engine=None,
+               tracer=None, rows=None):
+        return self.evaluate(
+            obj, attrgetter, flat_obj, nested_flat_obj, nested_iter_obj,
+            memo, refs, engine, tracer, rows
+        )
+
+    def filter(self, obj, flat_obj=None, nested_flat_obj=None,
+               nested_iter_obj=None, memo=None, refs=False, engine=None,
+               tracer=None, rows=None):
+        return self.evaluate(
+            obj, itemgetter, flat_obj, nested_flat_obj, nested_iter_obj,
+            memo, refs, engine, tracer, rows
+        )
+
+    def auto(self, obj, flat_obj=None, nested_flat_obj=None,
+             nested_iter_obj=None, memo=None, refs=False, engine=None,
+             tracer=None, rows=None):
+        # Read mappings by item and other objects by attribute
+        return self.evaluate(
+            obj, auto_getter, flat_obj, nested_flat_obj, nested_iter_obj,
+            memo, refs, engine, tracer, rows
+        )
+
+    def refresh(self, previous, obj, dirty, mode="dictfy", flat_obj=None,
+                nested_flat_obj=None, nested_iter_obj=None):
+        # Result of obj computed again only along dirty paths,
+        # everything else is taken from previous result
+        from .incremental import refresh
+        return refresh(
+            self, previous, obj, dirty, mode_getter(mode),
+            flat_obj, nested_flat_obj, nested_iter_obj
+        )
+
+    def schema(self):
+        # Layout of rows returned with rows=True
+        return schema(self.root)
+
+    def iterate(self, obj, getter, path=None, flat_obj=None,
+                nested_flat_obj=None, nested_iter_obj=None):
+        # Lazily evaluate elements of the root iterable or of an
+        # iterable reached by following path of nested field names
+        if isinstance(path, str):
+            path = (path,)
+
+        hooks = (
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj)
+        )
+        node = self.root
+        for name in path or ():
+            field = find_field(node, name)
+            obj = field_value(field, getter, obj, *hooks)
+            node = field.child
+
+        if not node.iterable:
+            message = "\"%s\" is not an iterable Query node." % (
+                str(node.query)
+            )
+            raise FormatError(message)
+
+        if node.page is not None:
+            obj = node.page.paginate(obj)
+        evaluate = self.evaluator(
+            getter, flat_obj, nested_flat_obj, nested_iter_obj,
+            node=node.child
+        )
+        return (evaluate(sub_obj) for sub_obj in obj)
+
+    def dictfy_iter(self, obj, path=None, flat_obj=None,
+                    nested_flat_obj=None, nested_iter_obj=None):
+        return self.iterate(
+            obj, attrgetter, path,
+            flat_obj, nested_flat_obj, nested_iter_obj
+        )
+
+    def filter_iter(self, obj, path=None, flat_obj=None,
+                    nested_flat_obj=None, nested_iter_obj=None):
+        return self.iterate(
+            obj, itemgetter, path,
+            flat_obj, nested_flat_obj, nested_iter_obj
+        )
+
+    def dictfy_columns(self, obj, dtype=None, flat_obj=None,
+                       nested_flat_obj=None, nested_iter_obj=None):
+        from .columns import columns
+        return columns(
+            self, obj, attrgetter, dtype,
+            flat_obj, nested_flat_obj, nested_iter_obj
+        )
+
+    def filter_columns(self, obj, dtype=None, flat_obj=None,
+                       nested_flat_obj=None, nested_iter_obj=None):
+        from .columns import columns
+        return columns(
+            self, obj, itemgetter, dtype,
+            flat_obj, nested_flat_obj, nested_iter_obj
+        )
+
+    def adictfy(self, obj, flat_obj=None, nested_flat_obj=None,
+                nested_iter_obj=None, limit=None):
+        # Return a coroutine, awaitable values are awaited concurrently
+        from .aio import evaluate
+        return evaluate(
+            self, obj, attrgetter,
+            flat_obj, nested_flat_obj, nested_iter_obj, limit
+        )
+
+    def afilter(self, obj, flat_obj=None, nested_flat_obj=None,
+                nested_iter_obj=None, limit=None):
+        from .aio import evaluate
+        return evaluate(
+            self, obj, itemgetter,
+            flat_obj, nested_flat_obj, nested_iter_obj, limit
+        )
+
+    def lazy(self, obj, mode="dictfy", flat_obj=None,
+             nested_flat_obj=None, nested_iter_obj=None):
+        # Read-only mapping or sequence computing values on first access
+        from .lazymap import Lazy
+
+        context = Context(
+            mode_getter(mode),
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj)
+        )
+        return Lazy(context).node(self.root, obj)
+
+    def dump(self, obj, fp, mode="dictfy", flat_obj=None,
+             nested_flat_obj=None, nested_iter_obj=None,
+             chunk_size=None, **kwargs):
+        # Write JSON text of the result to a file-like object fp
+        from .encoder import Encoder, Writer, CHUNK_SIZE
+
+        writer = Writer(fp.write, chunk_size or CHUNK_SIZE)
+        encoder = Encoder(
+            self,
+            mode_getter(mode),
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj),
+            writer.write,
+            **kwargs
+        )
+        encoder.node(self.root, obj)
+        writer.flush()
+
+    def dumps(self, obj, mode="dictfy", flat_obj=None,
+              nested_flat_obj=None, nested_iter_obj=None, **kwargs):
+        # Return JSON text of the result, small pieces are joined into
+        # chunks as they come so that only chunks are held
+        from .encoder import Encoder, Writer, CHUNK_SIZE
+
+        chunks = []
+        writer = Writer(chunks.append, CHUNK_SIZE)
+        encoder = Encoder(
+            self,
+            mode_getter(mode),
+            bind_hook(flat_obj),
+            bind_hook(nested_flat_obj),
+            bind_hook(nested_iter_obj),
+            writer.write,
+            **kwargs
+        )
+        encoder.node(self.root, obj)
+        writer.flush()
+        return "".join(chunks)
+
+    def source(self, mode="dictfy", flat_obj=None,
+               nested_flat_obj=None, nested_iter_obj=None):
+        # Source of the function generated for mode, for debugging
+        if not self.codegen:
+            raise ValueError(
+                "Plan was not compiled with 'codegen=True', "
+                "it has no generated source."
+            )
+        getter = mode_getter(mode)
+        evaluate = self.evaluator(
+            getter, flat_obj, nested_flat_obj, nested_iter_obj
+        )
+        return evaluate.source
@@ -0,0 +1,69 @@
+from collections import namedtuple
+
+from .exceptions import FormatError
+
+
+# Namedtuple classes of rows, keyed by their field names
+row_types = {}
+
+
+def make_row(fields, values):
+    # Rebuild a named row, used when rows are unpickled
+    return tuple.__new__(row_type(fields), values)
+
+
+def row_type(fields):
+    # Namedtuple class of rows with fields, created once per fields
+    cls = row_types.get(fields)
+    if cls is None:
+        cls = namedtuple("Row", fields, rename=True)
+        # Generated classes can't be found by name, so pickle
+        # field names and rebuild the class from them
+        cls.__reduce__ = lambda row: (make_row, (fields, tuple(row)))
+        cls = row_types.setdefault(fields, cls)
+    return cls
+
+
+def row_fields(node):
+    # Names of fields of a flat or nested node in the order their
+    # values appear in a row, a name used twice keeps its first place
+    # like in a dict
+    names = []
+    seen = set()
+    for field in node.fields:
+        if field.name not in seen:
+            seen.add(field.name)
+            names.append(field.name)
+    return tuple(names)
+
+
+def schema(node, expanding=None):
+    # Describe rows of node, flat or nested nodes are tuples of
+    # field names and (name, schema) pairs for fields with a child
+    # query, iterable nodes are lists with the schema of elements
+    if expanding is None:
+        expanding = set()
+
+    if node.iterable:
+        return [schema(node.child, expanding)]
+
+    if node in expanding:
+        message = (
+            "\"%s\" node is recursive, its schema is infinite. "
+            "Use rows=\"named\" to get rows which describe themselves."
+        ) % str(node.query)
+        raise FormatError(message)
+
+    children = {}
+    for field in node.fields:
+        children[field.name] = field.child
+
+    expanding.add(node)
+    try:
+        return tuple(
+            name if children[name] is None
+            else (name, schema(children[name], expanding))
+            for name in row_fields(node)
+        )
+    finally:
+        expanding.discard(node)
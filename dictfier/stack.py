@@ -0,0 +1,126 @@
+from .plan import (
+    FLAT, NEW, COMPUTED, EMPTY, NESTED, NESTED_ITER, field_getter
+)
+
+
+# Marks the end of an iterable
+END = object()
+
+# Position of frames whose result is reused from memo, past all fields
+REUSED = float("inf")
+
+
+class Stack(object):
+    # Evaluate plan nodes with an explicit stack of frames instead of
+    # recursion, so objects can be nested arbitrarily deep. Frames are
+    # lists of [node, obj, result, position, target, key], position is
+    # index of the next field or iterator over sub objects and target
+    # is the container of the parent frame which result goes to
+    def __init__(self, context):
+        self.context = context
+        self.memo = context.memo
+        self.prepared = {}
+
+    def prepare(self, node):
+        # Getters and hooks of all fields of a flat or nested node
+        context = self.context
+        fields = []
+        for field in node.fields:
+            get = hook = None
+            if field.kind in (FLAT, NESTED, NESTED_ITER):
+                get = field_getter(field, context.getter)
+                if field.kind == FLAT:
+                    hook = context.flat_obj
+                elif field.kind == NESTED:
+                    hook = context.nested_flat_obj
+                else:
+                    hook = context.nested_iter_obj
+            fields.append((field, get, hook))
+        fields = self.prepared[node] = tuple(fields)
+        return fields
+
+    def frame(self, node, obj, target, key):
+        if node.iterable:
+            if node.page is not None:
+                obj = node.page.paginate(obj)
+            return [node, obj, [], iter(obj), target, key]
+
+        memo = self.memo
+        if memo is not None:
+            entry = memo.get((id(obj), node))
+            if entry is not None:
+                result = dict(entry[1]) if memo.copy else entry[1]
+                return [node, obj, result, REUSED, target, key]
+        return [node, obj, {}, 0, target, key]
+
+    def evaluate(self, root, obj):
+        prepared = self.prepared
+        memo = self.memo
+        holder = []
+        stack = [self.frame(root, obj, holder, None)]
+        while stack:
+            frame = stack[-1]
+            node = frame[0]
+            result = frame[2]
+
+            if node.iterable:
+                sub_obj = next(frame[3], END)
+                if sub_obj is not END:
+                    stack.append(
+                        self.frame(node.child, sub_obj, result, None)
+                    )
+                    continue
+            else:
+                fields = prepared.get(node)
+                if fields is None:
+                    fields = self.prepare(node)
+
+                obj = frame[1]
+                position = frame[3]
+                child = None
+                while position < len(fields):
+                    field, get, hook = fields[position]
+                    position += 1
+
+                    kind = field.kind
+                    if kind == NEW:
+                        value = field.value
+                    elif kind == EMPTY:
+                        value = {}
+                    elif kind == COMPUTED:
+                        value = field.value(obj)
+                    else:
+                        value = get(obj)
+                        if hook is not None:
+                            value = hook(value, obj, field.name)
+
+                    if field.child is None:
+                        result[field.name] = value
+                    else:
+                        child = self.frame(
+                            field.child, value, result, field.name
+                        )
+                        break
+
+                if child is not None:
+                    frame[3] = position
+                    stack.append(child)
+                    continue
+
+            # Frame is complete, hand its result to the parent
+            stack.pop()
+            if (memo is not None and not node.iterable and
+                    frame[3] is not REUSED):
+                # Keep obj alive so that its id is not reused
+                memo[(id(frame[1]), node)] = (frame[1], result)
+            target = frame[4]
+            if isinstance(target, list):
+                target.append(result)
+            else:
+                target[frame[5]] = result
+
+        return holder[0]
+
+
+def evaluate(node, obj, context):
+    return Stack(context).evaluate(node, obj)
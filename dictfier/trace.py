@@ -0,0 +1,111 @@
+import sys
+
+try:
+    from time import perf_counter as clock
+except ImportError:
+    from time import time as clock
+
+
+def count(value):
+    # Number of elements produced by a field
+    if isinstance(value, list):
+        return len(value)
+    return 1
+
+
+def traced(name, step, tracer, path):
+    # Wrap step of a field so that tracer gets enter and exit events,
+    # path is a list of field names shared by all steps of one call
+    def traced_step(obj):
+        if name is not None:
+            path.append(name)
+        current = tuple(path)
+        tracer.enter(current)
+        start = clock()
+        # Failed steps produce no elements
+        produced = 0
+        try:
+            value = step(obj)
+            produced = count(value)
+        finally:
+            if name is not None:
+                path.pop()
+            tracer.exit(current, clock() - start, produced)
+        return value
+    return traced_step
+
+
+class Tracer(object):
+    # Base class of tracers, receives an event when evaluation of a
+    # query node starts and when it ends. Path is a tuple of field names
+    # from the root, elapsed is in seconds and count is number of
+    # elements produced(length of lists, 1 for everything else)
+    def enter(self, path):
+        pass
+
+    def exit(self, path, elapsed, count):
+        pass
+
+
+class Profile(Tracer):
+    # Aggregate time and elements per query path
+    def __init__(self):
+        # path -> [calls, elapsed, elements]
+        self.stats = {}
+
+    def exit(self, path, elapsed, count):
+        stats = self.stats.get(path)
+        if stats is None:
+            self.stats[path] = [1, elapsed, count]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += count
+
+    def self_time(self, path):
+        # Time spent on path excluding its children
+        elapsed = self.stats[path][1]
+        for other, stats in self.stats.items():
+            if len(other) == len(path) + 1 and other[:len(path)] == path:
+                elapsed -= stats[1]
+        return max(elapsed, 0.0)
+
+    def paths(self):
+        # Paths in tree order, parents before their children
+        return sorted(
+            self.stats, key=lambda path: [str(name) for name in path]
+        )
+
+    def folded(self):
+        # Lines in folded stacks format(self time in microseconds)
+        # which flame graph tools accept
+        return [
+            "%s %d" % (
+                ";".join(["<root>"] + [str(name) for name in path]),
+                self.self_time(path) * 1e6
+            )
+            for path in self.paths()
+        ]
+
+    def report(self, file=None, width=30):
+        # Print time per path as an indented tree with bars
+        file = file or sys.stdout
+        if () in self.stats:
+            total = self.stats[()][1]
+        else:
+            total = sum(
+                stats[1] for path, stats in self.stats.items()
+                if len(path) == 1
+            )
+
+        file.write("%-40s %10s %6s %8s %10s\n" % (
+            "path", "time(ms)", "%", "calls", "elements"
+        ))
+        for path in self.paths():
+            calls, elapsed, elements = self.stats[path]
+            share = elapsed / total if total else 0.0
+            label = "  " * len(path) + (str(path[-1]) if path else "<root>")
+            file.write("%-40s %10.3f %6.1f %8d %10d %s\n" % (
+                label, elapsed * 1e3, share * 100, calls, elements,
+                "#" * int(round(share * width))
+            ))
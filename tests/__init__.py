@@ -1 +1,8 @@
+import sys
+
 from . import test
+
+if sys.version_info >= (3, 5):
+    # async/await can't be parsed by older versions, py35 has no
+    # __init__.py so that test scanners never import it there
+    from .py35.test_async import TestAsyncAPI
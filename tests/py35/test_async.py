@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+
+import dictfier
+
+
+class Course(object):
+    def __init__(self, code, name):
+        self.code = code
+        self.name = name
+
+
+class Student(object):
+    def __init__(self, name, age, course=None, courses=()):
+        self.name = name
+        self.age = age
+        self.course = course
+        self.courses = courses
+
+
+#****************  adictfy and afilter API Tests  *******************#
+
+class TestAsyncAPI(unittest.TestCase):
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_adictfy(self):
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        students = [
+            Student("Danish", 24, course1, [course1, course2]),
+            Student("Yezy", 23, course2, [course2]),
+        ]
+        running = []
+        concurrency = []
+
+        async def fetch(value):
+            running.append(value)
+            concurrency.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(value)
+            return value
+
+        async def course(obj):
+            return await fetch(obj.course)
+
+        query = [[
+            "name",
+            {
+                "age": dictfier.useobj(lambda obj: fetch(obj.age)),
+                "course": dictfier.useobj(course, ["code"]),
+                "courses": [["code", "name"]],
+            }
+        ]]
+
+        async def upper(obj):
+            return await fetch(obj.upper())
+
+        result = self.run_async(
+            dictfier.adictfy(students, query, flat_obj=upper)
+        )
+        self.assertEqual(
+            result,
+            [
+                {
+                    "name": "DANISH",
+                    "age": 24,
+                    "course": {"code": "CS201"},
+                    "courses": [
+                        {"code": "CS201", "name": "DATA STRUCTURES"},
+                        {"code": "CS205", "name": "COMPUTER NETWORKS"}
+                    ]
+                },
+                {
+                    "name": "YEZY",
+                    "age": 23,
+                    "course": {"code": "CS205"},
+                    "courses": [
+                        {"code": "CS205", "name": "COMPUTER NETWORKS"}
+                    ]
+                }
+            ]
+        )
+        # Awaitables of all objects are run together
+        self.assertGreater(max(concurrency), 2)
+
+        del concurrency[:]
+        self.run_async(
+            dictfier.adictfy(students, query, flat_obj=upper, limit=2)
+        )
+        self.assertEqual(max(concurrency), 2)
+
+    def test_afilter(self):
+        async def age(obj):
+            return obj["age"]
+
+        plan = dictfier.compile(["name", {"age": dictfier.useobj(age)}])
+        self.assertEqual(
+            self.run_async(plan.afilter({"name": "Danish", "age": 24})),
+            {"name": "Danish", "age": 24}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
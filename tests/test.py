@@ -1,7 +1,18 @@
+import collections
+import io
+import json
+import operator
+import pickle
+import sys
 import unittest
 
 import dictfier
+import dictfier.bench
+import dictfier.columns
+import dictfier.extract
 
+# Dicts keep insertion order, so results have the order of the query
+ORDERED_DICTS = sys.version_info >= (3, 6)
 
 #****************  dictify API Tests  ***********************#
 
@@ -540,6 +551,98 @@ class TestDictfyAPI(unittest.TestCase):
         with self.assertRaises(TypeError):
             dictfier.dictfy(student, query5)
 
+    def test_config_arity_resolved_once(self):
+        students = [Student("Danish", i) for i in range(50)]
+
+        def upper(obj):
+            return obj.upper() if isinstance(obj, str) else obj
+
+        calls = []
+        args_len = dictfier.factory.args_len
+
+        def counted_args_len(function):
+            calls.append(function)
+            return args_len(function)
+
+        dictfier.factory.args_len = counted_args_len
+        try:
+            result = dictfier.dictfy(
+                students, [["name", "age"]], flat_obj=upper
+            )
+            dictfier.dictfy(students, [["name", "age"]], flat_obj=upper)
+        finally:
+            dictfier.factory.args_len = args_len
+
+        self.assertEqual(result[0], {"name": "DANISH", "age": 0})
+        self.assertEqual(calls, [upper])
+
+        def invalid(obj, parent, field_name, extra):
+            return obj
+
+        # Invalid customizers fail only when they are used
+        self.assertEqual(
+            dictfier.dictfy(students[0], [], flat_obj=invalid), {}
+        )
+        with self.assertRaises(TypeError):
+            dictfier.dictfy(students[0], ["name"], flat_obj=invalid)
+
+    def test_query_validated_once(self):
+        students = [Student("Danish", 24, courses=[]) for i in range(50)]
+        query = [["name", {"courses": [["code"]]}]]
+
+        calls = []
+        valid_query = dictfier.factory.valid_query
+
+        def counted_valid_query(query):
+            calls.append(query)
+            return valid_query(query)
+
+        dictfier.factory.valid_query = counted_valid_query
+        try:
+            dictfier.dictfy(students, query)
+        finally:
+            dictfier.factory.valid_query = valid_query
+
+        # One call per query node, no matter how many objects
+        self.assertEqual(len(calls), 4)
+
+        # Child queries are validated even if they are never reached
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.dictfy(students, [["name", {"courses": [[566]]}]])
+
+    def test_single_object_not_copied(self):
+        course = Course("CS201", "Data Structures")
+        student = Student("Danish", 24, course, [course, course])
+
+        calls = []
+        validate = dictfier.factory.validate
+
+        def counted_validate(query, *args):
+            calls.append(query)
+            return validate(query, *args)
+
+        dictfier.factory.validate = counted_validate
+        try:
+            self.assertEqual(
+                dictfier.dictfy(student, ["name", {"course": ["code"]}]),
+                {"name": "Danish", "course": {"code": "CS201"}}
+            )
+            # Nodes evaluated once are only checked
+            self.assertEqual(calls, [])
+
+            courses = [["code"]]
+            self.assertEqual(
+                dictfier.dictfy(student, ["name", {"courses": courses}]),
+                {"name": "Danish",
+                 "courses": [{"code": "CS201"}, {"code": "CS201"}]}
+            )
+            self.assertIs(calls[0], courses)
+        finally:
+            dictfier.factory.validate = validate
+
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.dictfy(student, ["name", {"course": ["code", 566]}])
+
 
 
 #****************  filter API Tests  ***********************#
@@ -1017,5 +1120,1876 @@ class TestFilterAPI(unittest.TestCase):
             dictfier.filter(student, query5)
 
 
+#****************  compile API Tests  ***********************#
+
+class Course(object):
+    def __init__(self, code, name, books=()):
+        self.code = code
+        self.name = name
+        self.books = books
+
+
+class Student(object):
+    def __init__(self, name, age, course=None, courses=()):
+        self.name = name
+        self.age = age
+        self.course = course
+        self.courses = courses
+
+
+class TestCompileAPI(unittest.TestCase):
+    def setUp(self):
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        self.students = [
+            Student("Danish", 24, course1, [course1, course2]),
+            Student("Yezy", 23, course2, [course2]),
+        ]
+        self.query = [
+            "name",
+            "age",
+            {
+                "course": ["code", "name"],
+                "courses": [["code"]],
+                "school": dictfier.newfield("St Patrick"),
+                "age_in_months": dictfier.useobj(lambda obj: obj.age * 12),
+                "first_course": dictfier.useobj(
+                    lambda obj: obj.courses[0],
+                    ["code"]
+                ),
+                "empty": [],
+            }
+        ]
+
+    def test_compiled_dictfy(self):
+        plan = dictfier.compile(self.query)
+        for student in self.students:
+            self.assertEqual(
+                plan.dictfy(student),
+                dictfier.dictfy(student, self.query)
+            )
+
+    def test_compiled_iterable_query(self):
+        plan = dictfier.compile([self.query])
+        self.assertEqual(
+            plan.dictfy(self.students),
+            dictfier.dictfy(self.students, [self.query])
+        )
+        self.assertEqual(
+            list(plan.dictfy(self.students)[0].keys()),
+            list(dictfier.dictfy(self.students, [self.query])[0].keys())
+        )
+
+    def test_compiled_filter(self):
+        students = [
+            {"name": "Danish", "age": 24, "course": {"code": "CS201"}},
+            {"name": "Yezy", "age": 23, "course": {"code": "CS205"}},
+        ]
+        query = [["name", {"course": ["code"]}]]
+        plan = dictfier.compile(query)
+        self.assertEqual(
+            plan.filter(students),
+            dictfier.filter(students, query)
+        )
+
+    def test_compiled_config(self):
+        plan = dictfier.compile(["name", {"course": ["code"]}])
+        self.assertEqual(
+            plan.dictfy(
+                self.students[0],
+                flat_obj=lambda obj, parent, name: "%s:%s" % (name, obj),
+                nested_flat_obj=lambda obj: obj,
+            ),
+            {"name": "name:Danish", "course": {"code": "code:CS201"}}
+        )
+
+    def test_codegen(self):
+        plan = dictfier.compile([self.query], codegen=True)
+        self.assertEqual(
+            plan.dictfy(self.students),
+            dictfier.dictfy(self.students, [self.query])
+        )
+        self.assertIn("def evaluate(obj):", plan.source())
+
+        def upper(obj):
+            return obj.upper() if isinstance(obj, str) else obj
+
+        self.assertEqual(
+            plan.dictfy(self.students, flat_obj=upper),
+            dictfier.dictfy(self.students, [self.query], flat_obj=upper)
+        )
+        self.assertIn("flat_obj(", plan.source(flat_obj=upper))
+
+        with self.assertRaises(ValueError):
+            dictfier.compile(self.query).source()
+
+    def test_codegen_filter(self):
+        student = {
+            "name": "Danish",
+            "class": "A",
+            "first name": "Danish",
+            "courses": [{"code": "CS201"}, {"code": "CS205"}],
+        }
+        query = ["class", "first name", {"courses": [["code"]]}]
+        plan = dictfier.compile(query, codegen=True)
+        self.assertEqual(
+            plan.filter(student),
+            dictfier.filter(student, query)
+        )
+        self.assertEqual(
+            plan.filter(student, nested_iter_obj=lambda obj: obj[:1]),
+            {"class": "A", "first name": "Danish",
+             "courses": [{"code": "CS201"}]}
+        )
+
+    def test_compile_format_violation(self):
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.compile(["name", 566])
+
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.compile(["name", {"courses": [["code"], "name"]}])
+
+        with self.assertRaises(TypeError):
+            dictfier.compile(["name", {"class": "HBO"}])
+    def test_memo(self):
+        course = Course("CS201", "Data Structures")
+        students = [Student("Danish", 24, course), Student("Yezy", 23, course)]
+        query = [["name", {"course": ["code", "name"]}]]
+
+        result = dictfier.dictfy(students, query, memo=True)
+        self.assertEqual(result, dictfier.dictfy(students, query))
+        self.assertIs(result[0]["course"], result[1]["course"])
+
+        result = dictfier.dictfy(students, query, memo="copy")
+        self.assertEqual(result, dictfier.dictfy(students, query))
+        self.assertIsNot(result[0]["course"], result[1]["course"])
+
+        result = dictfier.dictfy(students, query, memo=True, engine="stack")
+        self.assertEqual(result, dictfier.dictfy(students, query))
+        self.assertIs(result[0]["course"], result[1]["course"])
+
+        result = dictfier.dictfy(
+            students, query, memo="copy", engine="stack"
+        )
+        self.assertEqual(result, dictfier.dictfy(students, query))
+        self.assertIsNot(result[0]["course"], result[1]["course"])
+
+        for memo in ["cpoy", "shared"]:
+            with self.assertRaises(ValueError):
+                dictfier.dictfy(students, query, memo=memo)
+
+        # Same obj queried with a different sub query is not reused
+        query = [[
+            "name",
+            {
+                "course": ["code"],
+                "other": dictfier.useobj(lambda obj: obj.course, ["name"])
+            }
+        ]]
+        self.assertEqual(
+            dictfier.dictfy(students, query, memo=True)[0],
+            {
+                "name": "Danish",
+                "course": {"code": "CS201"},
+                "other": {"name": "Data Structures"}
+            }
+        )
+
+    def test_recursive_query(self):
+        class Comment(object):
+            def __init__(self, text, replies):
+                self.text = text
+                self.replies = replies
+
+        thread = Comment("a", [Comment("b", [Comment("c", [])])])
+        query = ["text"]
+        query.append({"replies": [query]})
+        expected = {
+            "text": "a",
+            "replies": [{
+                "text": "b",
+                "replies": [{"text": "c", "replies": []}]
+            }]
+        }
+        self.assertEqual(dictfier.dictfy(thread, query), expected)
+        self.assertEqual(dictfier.compile(query).dictfy(thread), expected)
+        self.assertEqual(
+            dictfier.compile(query, codegen=True).dictfy(thread), expected
+        )
+
+    def test_stack_engine(self):
+        class Comment(object):
+            def __init__(self, text, replies):
+                self.text = text
+                self.replies = replies
+
+        query = ["text", {"count": dictfier.useobj(lambda obj: 1)}]
+        query.append({"replies": [query]})
+
+        # Deeper than recursion limit
+        thread = Comment("0", [])
+        for index in range(sys.getrecursionlimit() + 100):
+            thread = Comment(str(index + 1), [thread])
+
+        result = dictfier.dictfy(thread, query, engine="stack")
+        depth = 0
+        while result["replies"]:
+            self.assertEqual(result["count"], 1)
+            result = result["replies"][0]
+            depth += 1
+        self.assertEqual(depth, sys.getrecursionlimit() + 100)
+        self.assertEqual(result, {"text": "0", "count": 1, "replies": []})
+
+        plan = dictfier.compile([self.query])
+        self.assertEqual(
+            plan.dictfy(self.students, engine="stack"),
+            plan.dictfy(self.students)
+        )
+
+        with self.assertRaises(ValueError):
+            plan.dictfy(self.students, engine="loop")
+
+    def test_refs(self):
+        class Person(object):
+            def __init__(self, name):
+                self.name = name
+                self.friends = []
+
+        danish = Person("Danish")
+        yezy = Person("Yezy")
+        danish.friends = [yezy]
+        yezy.friends = [danish, yezy]
+
+        query = ["name"]
+        query.append({"friends": [query]})
+        self.assertEqual(
+            dictfier.dictfy(danish, query, refs=True),
+            {
+                "name": "Danish",
+                "friends": [{
+                    "name": "Yezy",
+                    "friends": [
+                        {"$ref": "#"},
+                        {"$ref": "#/friends/0"}
+                    ]
+                }]
+            }
+        )
+
+        # Objects shared by many parents are converted once
+        course = Course("CS201", "Data Structures")
+        students = [Student("Danish", 24, course), Student("Yezy", 23, course)]
+        query = [["name", {"course": ["code"]}]]
+        self.assertEqual(
+            dictfier.dictfy(students, query, refs=True),
+            [
+                {"name": "Danish", "course": {"code": "CS201"}},
+                {"name": "Yezy", "course": {"$ref": "#/0/course"}}
+            ]
+        )
+
+
+class Upper(object):
+    # Customizer which can't be hashed
+    __hash__ = None
+
+    def __eq__(self, other):
+        return isinstance(other, Upper)
+
+    def __call__(self, value, parent, name):
+        return value.upper() if isinstance(value, str) else value
+
+
+class TestUnhashableCustomizers(unittest.TestCase):
+    def test_unhashable_customizers(self):
+        student = Student("Danish", 24)
+        query = ["name", "age"]
+        expected = {"name": "DANISH", "age": 24}
+        hook = Upper()
+        plan = dictfier.compile(query)
+        self.assertEqual(dictfier.dictfy(student, query, flat_obj=hook),
+                         expected)
+        self.assertEqual(plan.dictfy(student, flat_obj=hook), expected)
+        self.assertEqual(
+            dictfier.compile(query, codegen=True).dictfy(
+                student, flat_obj=hook
+            ),
+            expected
+        )
+        self.assertEqual(
+            dictfier.dictfy(student, query, flat_obj=hook, rows=True),
+            ("DANISH", 24)
+        )
+        self.assertEqual(
+            dictfier.dictfy(
+                student, query, flat_obj=hook, engine="recursive"
+            ),
+            expected
+        )
+
+
+#****************  access API Tests  ********************************#
+
+class TestAccessAPI(unittest.TestCase):
+    def setUp(self):
+        # Objects holding dicts holding objects
+        self.students = [
+            Student(
+                "Danish", 24,
+                course={"code": "CS", "teacher": Course("T1", "Msuya")}
+            ),
+            Student(
+                "Lyamuya", 22,
+                course={"code": "IT", "teacher": Course("T2", "Juma")}
+            ),
+        ]
+        self.query = [[
+            "name",
+            {
+                "course": dictfier.access([
+                    "code",
+                    {"teacher": ["name"]}
+                ], by="item")
+            }
+        ]]
+        self.expected = [
+            {"name": "Danish", "course": {
+                "code": "CS", "teacher": {"name": "Msuya"}
+            }},
+            {"name": "Lyamuya", "course": {
+                "code": "IT", "teacher": {"name": "Juma"}
+            }},
+        ]
+
+    def test_mixed_objects_and_dicts(self):
+        plan = dictfier.compile(self.query)
+        generated = dictfier.compile(self.query, codegen=True)
+        results = [
+            dictfier.dictfy(self.students, self.query),
+            plan.dictfy(self.students),
+            generated.dictfy(self.students),
+            plan.dictfy(self.students, engine="stack"),
+            plan.dictfy(self.students, refs=True),
+            plan.lazy(self.students).materialize(),
+            list(plan.dictfy_iter(self.students)),
+            json.loads(plan.dumps(self.students)),
+        ]
+        for result in results:
+            self.assertEqual(result, self.expected)
+
+    def test_access_on_iterable_and_root(self):
+        students = [
+            {"name": "Danish", "courses": [Course("CS", "Programming")]}
+        ]
+        query = dictfier.access([[
+            "name",
+            {"courses": dictfier.access([["code"]], by="attr")}
+        ]], by="item")
+        expected = [{"name": "Danish", "courses": [{"code": "CS"}]}]
+        self.assertEqual(dictfier.dictfy(students, query), expected)
+        self.assertEqual(dictfier.compile(query).dictfy(students), expected)
+        self.assertEqual(
+            dictfier.compile(query, codegen=True).dictfy(students), expected
+        )
+
+    def test_custom_accessor(self):
+        def get(obj, name):
+            return obj.get(name, "unknown")
+
+        student = {"name": "Danish"}
+        query = dictfier.access(["name", "age"], by=get)
+        expected = {"name": "Danish", "age": "unknown"}
+        self.assertEqual(dictfier.filter(student, query), expected)
+        self.assertEqual(dictfier.compile(query).filter(student), expected)
+        self.assertEqual(
+            dictfier.compile(query, codegen=True).filter(student), expected
+        )
+
+    def test_parallel(self):
+        self.assertEqual(
+            dictfier.dictfy(
+                self.students, self.query, workers=2, chunk_size=1
+            ),
+            self.expected
+        )
+
+    def test_invalid_accessor(self):
+        with self.assertRaises(ValueError):
+            dictfier.access(["name"], by="key")
+
+
+#****************  auto API Tests  **********************************#
+
+class TestAutoAPI(unittest.TestCase):
+    def setUp(self):
+        self.students = [
+            Student("Danish", 24, course={"code": "CS", "books": [
+                Course("B1", "Algorithms"), {"code": "B2", "name": "SICP"}
+            ]}),
+            {"name": "Lyamuya", "age": 22, "course": Course("IT", "Web")},
+        ]
+        self.query = [[
+            "name",
+            {"course": ["code"]},
+        ]]
+        self.expected = [
+            {"name": "Danish", "course": {"code": "CS"}},
+            {"name": "Lyamuya", "course": {"code": "IT"}},
+        ]
+
+    def test_auto(self):
+        plan = dictfier.compile(self.query)
+        generated = dictfier.compile(self.query, codegen=True)
+        results = [
+            dictfier.auto(self.students, self.query),
+            plan.auto(self.students),
+            generated.auto(self.students),
+            plan.auto(self.students, engine="stack"),
+            plan.lazy(self.students, mode="auto").materialize(),
+            json.loads(plan.dumps(self.students, mode="auto")),
+        ]
+        for result in results:
+            self.assertEqual(result, self.expected)
+
+        accessors = dictfier.factory.auto_accessors
+        self.assertIs(accessors[dict], operator.getitem)
+        self.assertIs(accessors[Student], getattr)
+
+    def test_auto_accessor(self):
+        query = [
+            "name",
+            {"course": dictfier.access([
+                "code",
+                {"books": dictfier.access([["name"]], by="auto")}
+            ], by="auto")}
+        ]
+        self.assertEqual(
+            dictfier.dictfy(self.students[0], query),
+            {"name": "Danish", "course": {"code": "CS", "books": [
+                {"name": "Algorithms"}, {"name": "SICP"}
+            ]}}
+        )
+
+    def test_runs(self):
+        # Accessor is resolved once per obj, runs are read at once
+        fields = ["name", "age", "id", "year"]
+        students = [
+            StudentSlots("Danish", 24, 1, 3),
+            dict(name="Juma", age=22, id=2, year=1),
+        ]
+        query = [fields + [{"school": dictfier.newfield("UDSM")}]]
+        expected = [
+            dict(name="Danish", age=24, id=1, year=3),
+            dict(name="Juma", age=22, id=2, year=1),
+        ]
+        for student in expected:
+            student["school"] = "UDSM"
+
+        plan = dictfier.compile(query)
+        self.assertEqual(dictfier.auto(students, query), expected)
+        self.assertEqual(plan.auto(students), expected)
+        self.assertEqual(plan.auto(students, rows=True), [
+            tuple(student[name] for name in fields + ["school"])
+            for student in expected
+        ])
+
+    def test_accessor_resolved_once_per_type(self):
+        dictfier.factory.auto_accessors.clear()
+        calls = []
+        resolve_accessor = dictfier.factory.resolve_accessor
+
+        def counted_resolve_accessor(cls):
+            calls.append(cls)
+            return resolve_accessor(cls)
+
+        dictfier.factory.resolve_accessor = counted_resolve_accessor
+        try:
+            dictfier.auto(self.students * 10, self.query)
+        finally:
+            dictfier.factory.resolve_accessor = resolve_accessor
+        self.assertEqual(sorted(map(str, calls)), sorted(map(str, [
+            Student, dict, Course
+        ])))
+
+
+#****************  dataclass, namedtuple and slots Tests  ***********#
+
+StudentTuple = collections.namedtuple(
+    "StudentTuple", ["name", "age", "id", "year"]
+)
+
+
+class StudentSlots(object):
+    __slots__ = ("name", "age", "id", "year")
+
+    def __init__(self, name, age, id, year):
+        self.name = name
+        self.age = age
+        self.id = id
+        self.year = year
+
+
+class TestFastPaths(unittest.TestCase):
+    def convert(self, obj, query):
+        # Result of every engine, they must all agree
+        plan = dictfier.compile(query)
+        results = [
+            dictfier.dictfy(obj, query),
+            plan.dictfy(obj),
+            dictfier.compile(query, codegen=True).dictfy(obj),
+            plan.dictfy(obj, engine="stack"),
+        ]
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+            self.assertEqual(list(result), list(results[0]))
+        return results[0]
+
+    def test_namedtuple(self):
+        class Renamed(StudentTuple):
+            @property
+            def age(self):
+                return "overridden"
+
+        students = [
+            StudentTuple("Danish", 24, 1, 3), StudentTuple("Juma", 22, 2, 1)
+        ]
+        self.assertEqual(
+            self.convert(students, [["name", "age", "id", "year"]]),
+            [
+                {"name": "Danish", "age": 24, "id": 1, "year": 3},
+                {"name": "Juma", "age": 22, "id": 2, "year": 1},
+            ]
+        )
+        self.assertEqual(
+            self.convert(students, [["year", "id", "name", "age"]]),
+            [
+                {"year": 3, "id": 1, "name": "Danish", "age": 24},
+                {"year": 1, "id": 2, "name": "Juma", "age": 22},
+            ]
+        )
+        self.assertEqual(
+            self.convert(
+                Renamed("Danish", 24, 1, 3), ["name", "age", "id", "year"]
+            ),
+            {"name": "Danish", "age": "overridden", "id": 1, "year": 3}
+        )
+
+    @unittest.skipIf(sys.version_info < (3, 7), "dataclasses not available")
+    def test_dataclass(self):
+        import dataclasses
+
+        StudentData = dataclasses.make_dataclass(
+            "StudentData", ["name", "age", "id", "year"]
+        )
+        query = [[
+            "name", "age", "id", "year", {"course": dictfier.newfield("CS")}
+        ]]
+        student = StudentData("Danish", 24, 1, 3)
+        extended = StudentData("Juma", 22, 2, 1)
+        extended.nickname = "J"
+        reordered = StudentData("Lyamuya", 21, 3, 2)
+        del reordered.name
+        reordered.name = "Lyamuya"
+
+        result = self.convert([student, extended, reordered], query)
+        self.assertEqual(result, [
+            {"name": "Danish", "age": 24, "id": 1, "year": 3, "course": "CS"},
+            {"name": "Juma", "age": 22, "id": 2, "year": 1, "course": "CS"},
+            {"name": "Lyamuya", "age": 21, "id": 3, "year": 2, "course": "CS"},
+        ])
+        self.assertEqual(
+            list(result[2]), ["name", "age", "id", "year", "course"]
+        )
+
+        self.assertIsNotNone(dictfier.extract.resolve(
+            StudentData, ("name", "age", "id", "year")
+        ))
+        self.assertIsNone(
+            dictfier.extract.resolve(StudentData, ("name", "age"))
+        )
+
+        # Results are never the obj's own __dict__
+        result[0]["name"] = "Changed"
+        self.assertEqual(student.name, "Danish")
+
+    def test_slots_and_mixed_classes(self):
+        students = [
+            StudentSlots("Danish", 24, 1, 3),
+            StudentTuple("Juma", 22, 2, 1),
+            Student("Lyamuya", 21),
+        ]
+        self.assertEqual(
+            self.convert(students, [["name", "age"]]),
+            [
+                {"name": "Danish", "age": 24},
+                {"name": "Juma", "age": 22},
+                {"name": "Lyamuya", "age": 21},
+            ]
+        )
+
+    def test_key_templates(self):
+        # Nodes with many keys build dicts from a template of their keys
+        students = [
+            Student("Danish", 24, Course("CS201", "Data Structures")),
+            Student("Juma", 22, Course("CS205", "Computer Networks")),
+        ]
+        query = [[
+            "name", "age",
+            {"course": ["code", "name"], "id": dictfier.newfield(1)},
+            "course",
+            {
+                "age": dictfier.useobj(lambda obj: obj.age + 1),
+                "year": dictfier.newfield(3),
+                "title": dictfier.objfield("name"),
+                "empty": [],
+            }
+        ]]
+        result = self.convert(students, query)
+        self.assertEqual(result[1], {
+            "name": "Juma", "age": 23, "id": 1, "year": 3, "title": "Juma",
+            "course": students[1].course, "empty": {}
+        })
+        if ORDERED_DICTS:
+            self.assertEqual(
+                list(result[0]),
+                ["name", "age", "course", "id", "year", "title", "empty"]
+            )
+        # Output dicts are never the template itself
+        self.assertIsNot(result[0], result[1])
+        self.assertIsNot(result[0]["empty"], result[1]["empty"])
+
+    def test_dotted_names(self):
+        # Names are attributes named literally, however long the run is
+        student = Student("Danish", 24, Course("CS201", "Data Structures"))
+        for query in (["course.code"], ["course.code", "name", "age", "id"]):
+            for convert in (
+                    lambda query: dictfier.dictfy(student, query),
+                    lambda query: dictfier.compile(query).dictfy(student),
+                    lambda query: dictfier.dictfy(
+                        student, query, engine="stack"
+                    ),
+                    lambda query: dictfier.dictfy(student, query, refs=True),
+                    lambda query: dictfier.dumps(student, query)):
+                with self.assertRaises(AttributeError):
+                    convert(query)
+
+        setattr(student, "course.code", "literal")
+        student.id = 1
+        query = [["course.code", "name", "age", "id"]]
+        self.assertEqual(
+            self.convert([student], query),
+            [{"course.code": "literal", "name": "Danish", "age": 24,
+              "id": 1}]
+        )
+        # Keys are never split
+        students = [{"a.b": 1, "c": 2, "d": 3, "e": 4}]
+        self.assertEqual(
+            dictfier.filter(students, [["a.b", "c", "d", "e"]]), students
+        )
+
+
+#****************  row output Tests  ********************************#
+
+class TestRows(unittest.TestCase):
+    def setUp(self):
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        self.students = [
+            Student("Danish", 24, course1, [course1, course2]),
+            Student("Lyamuya", 22, course2, [course2]),
+        ]
+        # A dict per field, so that rows have the same order everywhere
+        self.query = [[
+            "name",
+            "age",
+            {"course": ["code"]},
+            {"courses": [["code", "name"]]},
+            {"school": dictfier.newfield("UDSM")},
+        ]]
+
+    def test_tuple_rows(self):
+        expected = [
+            ("Danish", 24, ("CS201",),
+             [("CS201", "Data Structures"), ("CS205", "Computer Networks")],
+             "UDSM"),
+            ("Lyamuya", 22, ("CS205",),
+             [("CS205", "Computer Networks")], "UDSM"),
+        ]
+        self.assertEqual(
+            dictfier.dictfy(self.students, self.query, rows=True), expected
+        )
+        self.assertEqual(
+            dictfier.compile(self.query, codegen=True).dictfy(
+                self.students, rows=True
+            ),
+            expected
+        )
+        self.assertEqual(dictfier.compile(self.query).schema(), [(
+            "name", "age", ("course", ("code",)),
+            ("courses", [("code", "name")]), "school"
+        )])
+
+    def test_named_rows(self):
+        result = dictfier.dictfy(self.students, self.query, rows="named")
+        self.assertEqual(result[0]._fields, (
+            "name", "age", "course", "courses", "school"
+        ))
+        self.assertEqual(result[0].courses[1].name, "Computer Networks")
+        self.assertEqual(result[1].course.code, "CS205")
+        self.assertIs(type(result[0]), type(result[1]))
+
+        # Same fields always give the same class, even after pickling
+        copied = pickle.loads(pickle.dumps(result))
+        self.assertEqual(copied, result)
+        self.assertIs(type(copied[0]), type(result[0]))
+
+    def test_rows_with_dicts_and_overwritten_fields(self):
+        students = [{"name": "Danish", "age": 24}]
+        query = [["name", "age", {"name": dictfier.newfield("Hidden")}]]
+        self.assertEqual(
+            dictfier.filter(students, query, rows=True), [("Hidden", 24)]
+        )
+        self.assertEqual(
+            dictfier.compile(query).schema(), [("name", "age")]
+        )
+
+    def test_recursive_query(self):
+        query = ["name"]
+        query.append({"friends": [query]})
+        danish = Student("Danish", 24)
+        danish.friends = [Student("Juma", 22)]
+        danish.friends[0].friends = []
+
+        result = dictfier.dictfy(danish, query, rows="named")
+        self.assertEqual(result, ("Danish", [("Juma", [])]))
+        self.assertEqual(result.friends[0].name, "Juma")
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.compile(query).schema()
+
+    def test_unsupported_engines(self):
+        with self.assertRaises(ValueError):
+            dictfier.dictfy(self.students, self.query, rows=True, refs=True)
+        with self.assertRaises(ValueError):
+            dictfier.dictfy(
+                self.students, self.query, rows=True, engine="stack"
+            )
+
+    def test_unknown_rows(self):
+        for rows in ["nmaed", "tuple", 2]:
+            with self.assertRaises(ValueError):
+                dictfier.dictfy(self.students, self.query, rows=rows)
+            with self.assertRaises(ValueError):
+                dictfier.compile(self.query).filter([], rows=rows)
+
+    def test_parallel(self):
+        students = [Student("Danish", age) for age in range(25)]
+        result = dictfier.dictfy(
+            students, [["name", "age"]], rows="named",
+            workers=2, chunk_size=10
+        )
+        self.assertEqual(result[3], ("Danish", 3))
+        self.assertEqual(result[3].age, 3)
+
+
+#****************  paged API Tests  *********************************#
+
+class QuerySet(object):
+    # Collection which records slices taken from it and must never
+    # be iterated as a whole, like a lazy ORM queryset
+    def __init__(self, items):
+        self.items = items
+        self.slices = []
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("QuerySet indices must be slices")
+        self.slices.append((index.start, index.stop))
+        return list(self.items[index])
+
+    def __iter__(self):
+        raise AssertionError("QuerySet was iterated as a whole")
+
+
+def numbers():
+    # Endless iterable of dicts
+    number = 0
+    while True:
+        yield {"number": number}
+        number += 1
+
+
+class TestPagedAPI(unittest.TestCase):
+    def setUp(self):
+        self.courses = [
+            Course("CS%d" % index, "Course %d" % index)
+            for index in range(20)
+        ]
+        self.students = [
+            Student("Danish", 24, courses=self.courses),
+            Student("Juma", 22, courses=[
+                Course("CS%d" % index, "Course %d" % index)
+                for index in range(3)
+            ]),
+        ]
+
+    def convert(self, obj, query, **kwargs):
+        # Result of every engine, they must all agree
+        plan = dictfier.compile(query)
+        results = [
+            dictfier.dictfy(obj, query, **kwargs),
+            plan.dictfy(obj, **kwargs),
+            dictfier.compile(query, codegen=True).dictfy(obj, **kwargs),
+            plan.dictfy(obj, engine="stack", **kwargs),
+            plan.dictfy(obj, refs=True, **kwargs),
+            plan.lazy(obj, **kwargs).materialize(),
+            json.loads(plan.dumps(obj, **kwargs)),
+        ]
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+        return results[0]
+
+    def test_nested_iterable(self):
+        query = [[
+            "name",
+            {"courses": dictfier.paged([["code"]], limit=2, offset=1)}
+        ]]
+        self.assertEqual(self.convert(self.students, query), [
+            {"name": "Danish", "courses": [{"code": "CS1"}, {"code": "CS2"}]},
+            {"name": "Juma", "courses": [{"code": "CS1"}, {"code": "CS2"}]},
+        ])
+
+        query = [[{"courses": dictfier.paged([["code"]], offset=18)}]]
+        self.assertEqual(self.convert(self.students, query), [
+            {"courses": [{"code": "CS18"}, {"code": "CS19"}]},
+            {"courses": []},
+        ])
+
+    def test_root_iterable(self):
+        query = dictfier.paged([["name"]], limit=1, offset=1)
+        self.assertEqual(
+            self.convert(self.students, query), [{"name": "Juma"}]
+        )
+        self.assertEqual(
+            list(dictfier.dictfy_iter(self.students, query)),
+            [{"name": "Juma"}]
+        )
+        self.assertEqual(
+            dictfier.dictfy_columns(self.students, query),
+            {"name": ["Juma"]}
+        )
+        self.assertEqual(
+            dictfier.dictfy(
+                self.courses, dictfier.paged([["code"]], limit=3, offset=15),
+                workers=2, chunk_size=1
+            ),
+            [{"code": "CS15"}, {"code": "CS16"}, {"code": "CS17"}]
+        )
+
+    def test_slice_is_pushed_down(self):
+        queryset = QuerySet(self.courses)
+        query = [[
+            "name",
+            {"courses": dictfier.paged([["code"]], limit=2, offset=5)}
+        ]]
+        result = dictfier.dictfy(
+            self.students[:1], query,
+            nested_iter_obj=lambda courses: queryset
+        )
+        self.assertEqual(
+            result[0]["courses"], [{"code": "CS5"}, {"code": "CS6"}]
+        )
+        self.assertEqual(queryset.slices, [(5, 7)])
+
+        result = dictfier.compile(query).dictfy(
+            self.students[:1], nested_iter_obj=lambda courses: queryset
+        )
+        self.assertEqual(
+            result[0]["courses"], [{"code": "CS5"}, {"code": "CS6"}]
+        )
+        self.assertEqual(queryset.slices, [(5, 7), (5, 7)])
+
+    def test_unsliceable_sequence(self):
+        # Sequences aren't required to support slices
+        query = [[{"courses": dictfier.paged([["code"]], limit=2, offset=1)}]]
+        students = [
+            Student("Danish", 24, courses=collections.deque(self.courses))
+        ]
+        self.assertEqual(self.convert(students, query), [
+            {"courses": [{"code": "CS1"}, {"code": "CS2"}]}
+        ])
+        self.assertEqual(
+            self.convert(
+                collections.deque(self.courses),
+                dictfier.paged([["code"]], limit=1, offset=3)
+            ),
+            [{"code": "CS3"}]
+        )
+
+    def test_iteration_stops_early(self):
+        query = dictfier.paged([["number"]], limit=3, offset=2)
+        expected = [{"number": 2}, {"number": 3}, {"number": 4}]
+        self.assertEqual(dictfier.filter(numbers(), query), expected)
+        self.assertEqual(
+            dictfier.compile(query).filter(numbers()), expected
+        )
+        self.assertEqual(
+            dictfier.compile(query, codegen=True).filter(numbers()),
+            expected
+        )
+
+    def test_with_access_and_recursion(self):
+        query = dictfier.paged(
+            dictfier.access([["code"]], by="item"), limit=1
+        )
+        courses = [{"code": "CS201"}, {"code": "CS205"}]
+        self.assertEqual(dictfier.dictfy(courses, query), [{"code": "CS201"}])
+        self.assertEqual(
+            dictfier.compile(query).dictfy(courses), [{"code": "CS201"}]
+        )
+
+        query = ["name"]
+        query.append({"courses": dictfier.paged([query], limit=1)})
+        danish = Student("Danish", 24)
+        danish.courses = [Student("Juma", 22), Student("Lyamuya", 21)]
+        self.assertEqual(self.convert(danish, query), {
+            "name": "Danish", "courses": [{"name": "Juma", "courses": []}]
+        })
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            dictfier.paged([["code"]], limit=-1)
+        with self.assertRaises(ValueError):
+            dictfier.paged([["code"]], offset="1")
+        query = [{"course": dictfier.paged(["code"], limit=1)}]
+        with self.assertRaises(dictfier.FormatError):
+            dictfier.dictfy(self.students[0], query)
+        with self.assertRaises(dictfier.FormatError):
+            dictfier.compile(query)
+
+
+#****************  batchobj API Tests  ******************************#
+
+class Grade(object):
+    def __init__(self, score):
+        self.score = score
+
+
+class TestBatchObjAPI(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.courses = [
+            Course("CS%d" % index, "Course %d" % index)
+            for index in range(3)
+        ]
+        self.students = [
+            Student("Danish", 24, courses=self.courses),
+            Student("Juma", 22, courses=self.courses[:1]),
+        ]
+
+    def grades(self, objs):
+        # Fetch grades of many objs at once
+        self.calls.append([obj.name for obj in objs])
+        return [Grade(len(obj.name)) for obj in objs]
+
+    def test_one_call_per_level(self):
+        query = [[
+            "name",
+            {
+                "grade": dictfier.batchobj(self.grades, ["score"]),
+                "courses": [[
+                    "code",
+                    {"grade": dictfier.batchobj(self.grades, ["score"])}
+                ]]
+            }
+        ]]
+        result = dictfier.dictfy(self.students, query)
+        self.assertEqual(self.calls, [
+            ["Danish", "Juma"],
+            ["Course 0", "Course 1", "Course 2", "Course 0"],
+        ])
+        self.assertEqual(result[1]["grade"], {"score": 4})
+        self.assertEqual(result[0]["courses"][2]["grade"], {"score": 8})
+        if ORDERED_DICTS:
+            self.assertEqual(
+                list(result[0]), ["name", "grade", "courses"]
+            )
+
+        self.calls = []
+        plan = dictfier.compile(query, codegen=True)
+        self.assertEqual(plan.dictfy(self.students), result)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_batched_values_with_batchobj_fields(self):
+        def mentors(objs):
+            self.calls.append([obj.name for obj in objs])
+            return [Student("Mentor of %s" % obj.name, 40) for obj in objs]
+
+        danish = Student("Danish", 24)
+        query = [[
+            "name",
+            {"mentor": dictfier.batchobj(
+                mentors,
+                ["name", {"mentor": dictfier.batchobj(mentors, ["name"])}]
+            )}
+        ]]
+        result = dictfier.dictfy([danish, Student("Juma", 22)], query)
+        self.assertEqual(self.calls, [
+            ["Danish", "Juma"],
+            ["Mentor of Danish", "Mentor of Juma"],
+        ])
+        self.assertEqual(result[0], {
+            "name": "Danish",
+            "mentor": {
+                "name": "Mentor of Danish",
+                "mentor": {"name": "Mentor of Mentor of Danish"}
+            }
+        })
+
+    def test_other_engines_call_per_obj(self):
+        query = [[
+            "name", {"grade": dictfier.batchobj(self.grades, ["score"])}
+        ]]
+        plan = dictfier.compile(query)
+        expected = plan.dictfy(self.students)
+        self.assertEqual(len(self.calls), 1)
+
+        self.calls = []
+        self.assertEqual(plan.dictfy(self.students, engine="stack"), expected)
+        self.assertEqual(self.calls, [["Danish"], ["Juma"]])
+
+        self.calls = []
+        result = plan.dictfy(self.students, rows=True)
+        self.assertEqual(result[0][0], "Danish")
+        self.assertEqual(len(self.calls), 2)
+
+        self.calls = []
+        columns = dictfier.dictfy_columns(self.students, query)
+        self.assertEqual(columns["name"], ["Danish", "Juma"])
+        self.assertEqual(self.calls, [["Danish", "Juma"]])
+
+    def test_filter_hooks_and_paging(self):
+        def grades(objs):
+            self.calls.append([obj["name"] for obj in objs])
+            return [{"score": len(obj["name"])} for obj in objs]
+
+        students = [
+            {"name": "Danish", "courses": [{"name": "CS201"}] * 5},
+            {"name": "Juma", "courses": [{"name": "CS205"}]},
+        ]
+        query = [[
+            "name",
+            {"courses": dictfier.paged([[
+                {"grade": dictfier.batchobj(grades, ["score"])}
+            ]], limit=2)}
+        ]]
+        result = dictfier.filter(
+            students, query, flat_obj=lambda value: value * 2
+        )
+        self.assertEqual(result, [
+            {"name": "DanishDanish", "courses": [
+                {"grade": {"score": 10}}, {"grade": {"score": 10}}
+            ]},
+            {"name": "JumaJuma", "courses": [{"grade": {"score": 10}}]},
+        ])
+        self.assertEqual(self.calls, [["CS201", "CS201", "CS205"]])
+
+    def test_overwritten_and_invalid(self):
+        query = [[
+            {"grade": dictfier.batchobj(self.grades)},
+            {"grade": dictfier.newfield(1)},
+        ]]
+        self.assertEqual(
+            dictfier.dictfy(self.students, query), [{"grade": 1}] * 2
+        )
+        self.assertEqual(self.calls, [])
+
+        query = [[{"grade": dictfier.batchobj(lambda objs: [])}]]
+        with self.assertRaises(ValueError):
+            dictfier.dictfy(self.students, query)
+
+
+#****************  Cache Tests  *************************************#
+
+class VersionedStudent(Student):
+    def __init__(self, pk, name, age):
+        super(VersionedStudent, self).__init__(name, age)
+        self.pk = pk
+        self.version = 1
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.danish = VersionedStudent(1, "Danish", 24)
+        self.juma = VersionedStudent(2, "Juma", 22)
+        self.cache = dictfier.Cache(
+            key=lambda obj: obj.pk, version=lambda obj: obj.version
+        )
+
+    def test_hits_and_misses(self):
+        cache = self.cache
+        result = cache.dictfy(self.danish, ["name", "age"])
+        self.assertEqual(result, {"name": "Danish", "age": 24})
+        # Equal queries share results
+        self.assertIs(cache.dictfy(self.danish, ("name", "age")), result)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Queries, options and modes are parts of the key
+        self.assertEqual(
+            cache.dictfy(self.danish, ["age", "name"]),
+            {"age": 24, "name": "Danish"}
+        )
+        self.assertEqual(
+            cache.dictfy(self.danish, ["name"], rows=True), ("Danish",)
+        )
+        self.assertEqual(
+            cache.auto(self.danish, ["name"], rows=True), ("Danish",)
+        )
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+        self.assertEqual(len(cache), 4)
+
+        cache = dictfier.Cache(key=operator.itemgetter("pk"))
+        student = {"pk": 3, "name": "Lyamuya"}
+        self.assertEqual(cache.filter(student, ["name"]), {"name": "Lyamuya"})
+        self.assertEqual(cache.filter(student, ["name"]), {"name": "Lyamuya"})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_versions_and_invalidation(self):
+        cache = self.cache
+        query = ["name", {"school": dictfier.newfield("UDSM")}]
+        cache.dictfy(self.danish, query)
+        cache.dictfy(self.juma, query)
+
+        self.danish.name = "Danish Lyamuya"
+        self.assertEqual(cache.dictfy(self.danish, query)["name"], "Danish")
+        self.danish.version = 2
+        self.assertEqual(
+            cache.dictfy(self.danish, query)["name"], "Danish Lyamuya"
+        )
+
+        self.juma.name = "Juma Hamisi"
+        self.assertEqual(cache.invalidate(2), 1)
+        self.assertEqual(cache.invalidate(2), 0)
+        self.assertEqual(cache.dictfy(self.juma, query)["name"], "Juma Hamisi")
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_and_ttl(self):
+        cache = dictfier.Cache(key=lambda obj: obj.pk, maxsize=2)
+        cache.dictfy(self.danish, ["name"])
+        cache.dictfy(self.juma, ["name"])
+        cache.dictfy(self.danish, ["name"])
+        # Juma is the least recently used
+        cache.dictfy(self.danish, ["age"])
+        self.assertEqual(len(cache), 2)
+        cache.dictfy(self.danish, ["name"])
+        cache.dictfy(self.juma, ["name"])
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        self.assertEqual(cache.invalidate(1), 1)
+
+        cache = dictfier.Cache(key=lambda obj: obj.pk, ttl=0)
+        cache.dictfy(self.danish, ["name"])
+        cache.dictfy(self.danish, ["name"])
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+        with self.assertRaises(ValueError):
+            dictfier.Cache(key=lambda obj: obj.pk, maxsize=0)
+
+    def test_uncacheable(self):
+        cache = dictfier.Cache(key=lambda obj: getattr(obj, "pk", None))
+        query = ["name", {"tags": dictfier.newfield(["new"])}]
+        self.assertEqual(
+            cache.dictfy(self.danish, query),
+            {"name": "Danish", "tags": ["new"]}
+        )
+        self.assertEqual(
+            cache.dictfy(Student("Juma", 22), ["name"]), {"name": "Juma"}
+        )
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 0))
+
+    def test_equal_values_of_different_types(self):
+        # True, 1 and 1.0 are equal but give different results
+        cache = self.cache
+        for value in (True, 1, 1.0):
+            query = ["name", {"flag": dictfier.newfield(value)}]
+            self.assertIs(
+                type(cache.dictfy(self.danish, query)["flag"]), type(value)
+            )
+            query = ["name", {"flags": dictfier.newfield((value,))}]
+            self.assertIs(
+                type(cache.dictfy(self.danish, query)["flags"][0]),
+                type(value)
+            )
+        self.assertEqual((cache.hits, cache.misses), (0, 6))
+
+        query_key = dictfier.cache.query_key
+        self.assertNotEqual(
+            query_key([{True: []}]), query_key([{1: []}])
+        )
+
+    def test_query_key(self):
+        query_key = dictfier.cache.query_key
+        function = operator.attrgetter("name")
+        recursive = ["name"]
+        recursive.append({"friends": [recursive]})
+        same = ["name"]
+        same.append({"friends": (same,)})
+        self.assertEqual(query_key(recursive), query_key(same))
+        self.assertEqual(
+            query_key([{"a": dictfier.useobj(function, ["b"])}]),
+            query_key([{"a": dictfier.useobj(function, ("b",))}])
+        )
+        self.assertNotEqual(
+            query_key(["access", "attr"]),
+            query_key(dictfier.access(["access"], by="attr"))
+        )
+        self.assertNotEqual(
+            query_key([{"a": dictfier.paged([["b"]], limit=1)}]),
+            query_key([{"a": dictfier.paged([["b"]], limit=2)}])
+        )
+        self.assertNotEqual(
+            query_key([{"a": dictfier.useobj(function)}]),
+            query_key([{"a": dictfier.batchobj(function)}])
+        )
+
+
+#****************  refresh API Tests  *******************************#
+
+class TestRefreshAPI(unittest.TestCase):
+    def setUp(self):
+        self.course = Course("CS201", "Data Structures")
+        self.courses = [
+            Course("CS%d" % index, "Course %d" % index)
+            for index in range(3)
+        ]
+        self.student = Student("Danish", 24, self.course, self.courses)
+        self.query = [
+            "name",
+            "age",
+            {
+                "course": ["code", "name"],
+                "courses": [["code", "name"]],
+                "school": dictfier.newfield("UDSM"),
+            }
+        ]
+        self.plan = dictfier.compile(self.query)
+        self.previous = self.plan.dictfy(self.student)
+
+    def test_dirty_fields(self):
+        previous = self.previous
+        self.student.age = 25
+        self.course.code = "CS202"
+        self.courses[1].name = "Renamed"
+
+        result = self.plan.refresh(
+            previous, self.student,
+            ["age", "course.code", ("courses", 1, "name")]
+        )
+        self.assertEqual(result, self.plan.dictfy(self.student))
+        self.assertEqual(result["courses"][1]["name"], "Renamed")
+        # Untouched parts are reused, previous result is not modified
+        self.assertIs(result["courses"][0], previous["courses"][0])
+        self.assertIsNot(result["course"], previous["course"])
+        self.assertEqual(previous["age"], 24)
+        self.assertEqual(previous["courses"][1]["name"], "Course 1")
+
+        self.assertIs(self.plan.refresh(result, self.student, []), result)
+
+    def test_dirty_elements(self):
+        for course in self.courses:
+            course.code = course.code.lower()
+        result = dictfier.refresh(
+            self.previous, self.student, self.query, ["courses.code"]
+        )
+        self.assertEqual(
+            [course["code"] for course in result["courses"]],
+            ["cs0", "cs1", "cs2"]
+        )
+
+        # Elements added or removed, the whole list is evaluated again
+        self.student.courses = self.courses[:2]
+        result = dictfier.refresh(
+            result, self.student, self.query, ["courses.0.code"]
+        )
+        self.assertEqual(result, self.plan.dictfy(self.student))
+
+        query = [{"courses": dictfier.paged([["code"]], limit=1)}]
+        previous = dictfier.dictfy(self.student, query)
+        self.courses[0].code = "CS"
+        result = dictfier.refresh(
+            previous, self.student, query, ["courses.0.code"]
+        )
+        self.assertEqual(result, {"courses": [{"code": "CS"}]})
+
+    def test_filter_hooks_and_recursion(self):
+        query = ["name"]
+        query.append({"friends": [query]})
+        danish = {"name": "Danish", "friends": [
+            {"name": "Juma", "friends": []},
+            {"name": "Lyamuya", "friends": []},
+        ]}
+        previous = dictfier.filter(danish, query)
+        danish["friends"][1]["name"] = "Lyamuya Hamisi"
+        result = dictfier.refresh(
+            previous, danish, query, ["friends.1.name"], mode="filter",
+            flat_obj=lambda value: value.upper()
+        )
+        self.assertEqual(result["friends"][1]["name"], "LYAMUYA HAMISI")
+        self.assertEqual(result["friends"][0]["name"], "Juma")
+
+        # Negative indexes count from the end in both forms
+        danish["friends"][1]["name"] = "Hamisi"
+        for path in ["friends.-1.name", ("friends", -1, "name")]:
+            result = dictfier.refresh(
+                previous, danish, query, [path], mode="filter"
+            )
+            self.assertEqual(result["friends"][1]["name"], "Hamisi")
+            self.assertIs(result["friends"][0], previous["friends"][0])
+        with self.assertRaises(IndexError):
+            dictfier.refresh(
+                previous, danish, query, ["friends.-3.name"], mode="filter"
+            )
+
+    def test_computed_fields(self):
+        # Computed fields can read dirty attributes, they are evaluated
+        # again on every node along a dirty path
+        query = [
+            "age",
+            {
+                "summary": dictfier.useobj(
+                    lambda obj: "%s %s" % (obj.name, obj.age)
+                ),
+                "course": ["code", {
+                    "title": dictfier.batchobj(
+                        lambda courses: [c.name.upper() for c in courses]
+                    )
+                }],
+                "courses": [["code"]],
+            }
+        ]
+        plan = dictfier.compile(query)
+        previous = plan.dictfy(self.student)
+
+        self.student.age = 25
+        self.course.code = "CS202"
+        self.course.name = "Algorithms"
+        result = plan.refresh(
+            previous, self.student, ["age", "course.code"]
+        )
+        self.assertEqual(result, plan.dictfy(self.student))
+        self.assertEqual(result["summary"], "Danish 25")
+        self.assertEqual(result["course"]["title"], "ALGORITHMS")
+        # Nodes off dirty paths are still reused
+        self.assertIs(result["courses"], previous["courses"])
+
+    def test_whole_result_and_errors(self):
+        self.student.name = "Juma"
+        result = self.plan.refresh(None, self.student, ["name"])
+        self.assertEqual(result, self.plan.dictfy(self.student))
+        for root in [(), "", "."]:
+            self.assertEqual(
+                self.plan.refresh(self.previous, self.student, [root]),
+                result
+            )
+        with self.assertRaises(dictfier.FormatError):
+            self.plan.refresh(self.previous, self.student, ["unknown"])
+
+
+#****************  tracer Tests  ************************************#
+
+class TestTracer(unittest.TestCase):
+    def test_tracer_events(self):
+        class Recorder(dictfier.Tracer):
+            def __init__(self):
+                self.events = []
+                self.elapsed = []
+
+            def enter(self, path):
+                self.events.append(("enter", path))
+
+            def exit(self, path, elapsed, count):
+                self.events.append(("exit", path, count))
+                self.elapsed.append(elapsed)
+
+        recorder = Recorder()
+
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        student = Student("Danish", 24, courses=[course1, course2])
+        query = ["name", {"courses": [["code"]]}]
+        self.assertEqual(
+            dictfier.dictfy(student, query, tracer=recorder),
+            dictfier.dictfy(student, query)
+        )
+        self.assertEqual(
+            recorder.events,
+            [
+                ("enter", ()),
+                ("enter", ("name",)),
+                ("exit", ("name",), 1),
+                ("enter", ("courses",)),
+                ("enter", ("courses", "code")),
+                ("exit", ("courses", "code"), 1),
+                ("enter", ("courses", "code")),
+                ("exit", ("courses", "code"), 1),
+                ("exit", ("courses",), 2),
+                ("exit", (), 1),
+            ]
+        )
+        self.assertTrue(all(elapsed >= 0 for elapsed in recorder.elapsed))
+
+    def test_profile(self):
+        students = [{"name": "Danish", "courses": [{"code": "CS201"}]}] * 3
+        profile = dictfier.Profile()
+        dictfier.filter(
+            students, [["name", {"courses": [["code"]]}]], tracer=profile
+        )
+        self.assertEqual(profile.stats[()][0], 1)
+        self.assertEqual(profile.stats[()][2], 3)
+        self.assertEqual(profile.stats[("courses", "code")][0], 3)
+
+        report = io.StringIO() if sys.version_info >= (3,) else io.BytesIO()
+        profile.report(report)
+        lines = report.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[1].startswith("<root>"))
+        self.assertTrue(lines[2].startswith("  courses"))
+        self.assertTrue(lines[3].startswith("    code"))
+        self.assertEqual(
+            [line.split()[0] for line in profile.folded()],
+            ["<root>", "<root>;courses", "<root>;courses;code", "<root>;name"]
+        )
+
+    def test_tracer_exit_on_error(self):
+        def fail(obj):
+            raise KeyError("grade")
+
+        profile = dictfier.Profile()
+        student = Student("Danish", 24)
+        query = ["name", {"grade": dictfier.useobj(fail)}]
+        with self.assertRaises(KeyError):
+            dictfier.dictfy(student, query, tracer=profile)
+        self.assertEqual(profile.stats[("grade",)][0], 1)
+        self.assertEqual(profile.stats[("grade",)][2], 0)
+        self.assertEqual(profile.stats[()][2], 0)
+
+    def test_unsupported_engines(self):
+        students = [Student("Danish", age) for age in range(25)]
+        query = [["name"]]
+        profile = dictfier.Profile()
+        with self.assertRaises(ValueError):
+            dictfier.dictfy(students, query, tracer=profile, refs=True)
+        with self.assertRaises(ValueError):
+            dictfier.dictfy(students, query, tracer=profile, engine="stack")
+        with self.assertRaises(ValueError):
+            dictfier.filter(
+                students, query, tracer=profile, workers=2, chunk_size=10
+            )
+
+
+#****************  dictfy_iter and filter_iter API Tests  ***********#
+
+class TestIterAPI(unittest.TestCase):
+    def test_dictfy_iter(self):
+        def students():
+            for age in range(3):
+                yield Student("Danish", age)
+
+        result = dictfier.dictfy_iter(students(), [["name", "age"]])
+        self.assertEqual(next(result), {"name": "Danish", "age": 0})
+        self.assertEqual(
+            list(result),
+            [{"name": "Danish", "age": 1}, {"name": "Danish", "age": 2}]
+        )
+
+    def test_dictfy_iter_nested_path(self):
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        student = Student("Danish", 24, courses=[course1, course2])
+        query = [
+            "name",
+            {
+                "courses": dictfier.useobj(
+                    lambda obj: obj.courses,
+                    [["code"]]
+                ),
+            }
+        ]
+        self.assertEqual(
+            list(dictfier.dictfy_iter(student, query, path="courses")),
+            [{"code": "CS201"}, {"code": "CS205"}]
+        )
+
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.dictfy_iter(student, query)
+
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.dictfy_iter(student, query, path="name")
+
+    def test_filter_iter(self):
+        student = {
+            "name": "Danish",
+            "course": {
+                "books": [{"title": "Networks"}, {"title": "Graphs"}]
+            }
+        }
+        query = ["name", {"course": [{"books": [["title"]]}]}]
+        result = dictfier.filter_iter(
+            student, query,
+            path=("course", "books"),
+            nested_iter_obj=lambda obj: reversed(obj)
+        )
+        self.assertEqual(
+            list(result),
+            [{"title": "Graphs"}, {"title": "Networks"}]
+        )
+
+
+#****************  lazy API Tests  **********************************#
+
+class TestLazyAPI(unittest.TestCase):
+    def test_lazy(self):
+        calls = []
+
+        def months(obj):
+            calls.append(obj.name)
+            return obj.age * 12
+
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        student = Student("Danish", 24, course1, [course1, course2])
+        query = [
+            "name",
+            "age",
+            {"age_in_months": dictfier.useobj(months)},
+            {"course": ["code"]},
+            {"courses": [["code", "name"]]},
+        ]
+
+        result = dictfier.lazy(student, query)
+        self.assertEqual(
+            list(result.keys()),
+            ["name", "age", "age_in_months", "course", "courses"]
+        )
+        self.assertEqual(result["name"], "Danish")
+        self.assertEqual(calls, [])
+
+        self.assertEqual(result["age_in_months"], 288)
+        self.assertEqual(result["age_in_months"], 288)
+        self.assertEqual(calls, ["Danish"])
+
+        self.assertEqual(result["courses"][1]["code"], "CS205")
+        self.assertEqual(len(result["courses"]), 2)
+        self.assertEqual(result["course"], {"code": "CS201"})
+
+        materialized = result.materialize()
+        self.assertEqual(calls, ["Danish"])
+        self.assertIs(type(materialized), dict)
+        self.assertIs(type(materialized["courses"][0]), dict)
+        self.assertEqual(materialized, dictfier.dictfy(student, query))
+
+        with self.assertRaises(KeyError):
+            result["school"]
+
+        with self.assertRaises(TypeError):
+            result["name"] = "Yezy"
+
+    def test_lazy_filter(self):
+        students = [{"name": "Danish"}, {"name": "Yezy"}]
+        result = dictfier.lazy(students, [["name"]], mode="filter")
+        self.assertEqual(result[-1]["name"], "Yezy")
+        self.assertEqual(result.materialize(), students)
+
+    def test_unknown_mode(self):
+        student = Student("Danish", 24)
+        plan = dictfier.compile(["name"], codegen=True)
+        calls = [
+            lambda: dictfier.lazy(student, ["name"], mode="bogus"),
+            lambda: dictfier.dumps(student, ["name"], mode="filtre"),
+            lambda: dictfier.dump(student, ["name"], io.BytesIO(), mode=""),
+            lambda: plan.source(mode=None),
+            lambda: dictfier.refresh(
+                {"name": "Danish"}, student, ["name"], ["name"],
+                mode="attr"
+            ),
+        ]
+        for call in calls:
+            with self.assertRaises(ValueError):
+                call()
+
+
+#****************  dump and dumps API Tests  ***********************#
+
+class TestDumpAPI(unittest.TestCase):
+    def setUp(self):
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        self.students = [
+            Student("Danish", 24, course1, [course1, course2]),
+            Student("Yezy", 23, course2, []),
+        ]
+        self.query = [[
+            "name",
+            "age",
+            {
+                "course": ["code", "name"],
+                "courses": [["code"]],
+                "school": dictfier.newfield({"name": "St Patrick"}),
+                "age_in_months": dictfier.useobj(lambda obj: obj.age * 12),
+                "courses_count": dictfier.useobj(
+                    lambda obj: obj.courses,
+                    [[]]
+                ),
+                "empty": [],
+            }
+        ]]
+
+    def assertSameJSON(self, dumped, expected):
+        if ORDERED_DICTS:
+            self.assertEqual(dumped, expected)
+        else:
+            # Keys of unordered dicts are dumped in any order
+            self.assertEqual(json.loads(dumped), json.loads(expected))
+
+    def test_dumps(self):
+        self.assertSameJSON(
+            dictfier.dumps(self.students, self.query),
+            json.dumps(dictfier.dictfy(self.students, self.query))
+        )
+
+    def test_dump(self):
+        def upper(obj):
+            return obj.upper() if isinstance(obj, str) else obj
+
+        fp = io.StringIO() if sys.version_info >= (3,) else io.BytesIO()
+        dictfier.dump(
+            self.students, self.query, fp,
+            flat_obj=upper,
+            chunk_size=16,
+            separators=(",", ":")
+        )
+        self.assertSameJSON(
+            fp.getvalue(),
+            json.dumps(
+                dictfier.dictfy(self.students, self.query, flat_obj=upper),
+                separators=(",", ":")
+            )
+        )
+
+    def test_dumps_filter(self):
+        student = {"name": "Danish", "age": 24}
+        query = ["name", "age", {"age": dictfier.newfield(25), 1: []}]
+        self.assertSameJSON(
+            dictfier.dumps(student, query, mode="filter"),
+            json.dumps(dictfier.filter(student, query))
+        )
+
+    @unittest.skipIf(
+        dictfier.bench.tracemalloc is None, "tracemalloc not available"
+    )
+    def test_dumps_memory(self):
+        rows = [
+            {"id": i, "name": "n%d" % i, "score": i * 1.5, "ok": True}
+            for i in range(20000)
+        ]
+        query = [["id", "name", "score", "ok"]]
+        size = len(dictfier.dumps(rows, query, mode="filter"))
+
+        peak = dictfier.bench.peak_memory(
+            lambda: dictfier.dumps(rows, query, mode="filter")
+        )
+        # Only chunks and the joined text are held, not every piece
+        self.assertLess(peak, 3 * size)
+        self.assertLess(
+            peak,
+            dictfier.bench.peak_memory(
+                lambda: json.dumps(dictfier.filter(rows, query))
+            )
+        )
+
+
+#****************  dictfy_columns and filter_columns API Tests  *****#
+
+class TestColumnsAPI(unittest.TestCase):
+    def test_dictfy_columns(self):
+        course1 = Course("CS201", "Data Structures")
+        course2 = Course("CS205", "Computer Networks")
+        students = [
+            Student("Danish", 24, course1),
+            Student("Yezy", 23, course2),
+        ]
+        query = [[
+            "name",
+            "age",
+            {
+                "course": ["code"],
+                "school": dictfier.newfield("St Patrick"),
+            }
+        ]]
+        self.assertEqual(
+            dictfier.dictfy_columns(students, query),
+            {
+                "name": ["Danish", "Yezy"],
+                "age": [24, 23],
+                "course": [{"code": "CS201"}, {"code": "CS205"}],
+                "school": ["St Patrick", "St Patrick"],
+            }
+        )
+
+        with self.assertRaises(dictfier.exceptions.FormatError):
+            dictfier.dictfy_columns(students[0], ["name"])
+
+    def test_filter_columns(self):
+        students = ({"id": i, "score": i * 1.5} for i in range(3))
+        self.assertEqual(
+            dictfier.filter_columns(
+                students, [["id", "score"]],
+                flat_obj=lambda obj: obj * 2
+            ),
+            {"id": [0, 2, 4], "score": [0.0, 3.0, 6.0]}
+        )
+
+    @unittest.skipIf(
+        dictfier.columns.numpy is None, "numpy is not installed"
+    )
+    def test_structured_array(self):
+        students = [{"id": i, "score": i * 1.5} for i in range(3)]
+        array = dictfier.filter_columns(
+            students, [["id", "score"]],
+            dtype=[("id", "i8"), ("score", "f8")]
+        )
+        self.assertEqual(array["id"].tolist(), [0, 1, 2])
+        self.assertEqual(array["score"].tolist(), [0.0, 1.5, 3.0])
+
+
+#****************  parallel dictfy and filter Tests  ****************#
+
+def double(obj):
+    return obj * 2
+
+
+class TestParallel(unittest.TestCase):
+    def test_parallel_filter(self):
+        students = [{"id": i, "name": "Danish"} for i in range(25)]
+        query = [["id", "name"]]
+        self.assertEqual(
+            dictfier.filter(
+                students, query, flat_obj=double,
+                workers=2, chunk_size=4
+            ),
+            dictfier.filter(students, query, flat_obj=double)
+        )
+
+    def test_parallel_dictfy(self):
+        students = (Student("Danish", age) for age in range(25))
+        self.assertEqual(
+            dictfier.dictfy(
+                students, [["name", "age"]], workers=2, chunk_size=10
+            ),
+            [{"name": "Danish", "age": age} for age in range(25)]
+        )
+
+    def test_parallel_fallback(self):
+        # Small or non iterable inputs are converted in process,
+        # so they don't need to be picklable
+        students = [Student("Danish", 24)]
+        query = [["name", {"age": dictfier.useobj(lambda obj: obj.age)}]]
+        self.assertEqual(
+            dictfier.dictfy(students, query, workers=2, chunk_size=10),
+            [{"name": "Danish", "age": 24}]
+        )
+        self.assertEqual(
+            dictfier.dictfy(students[0], query[0], workers=2),
+            {"name": "Danish", "age": 24}
+        )
+
+        # Less than a full chunk per worker
+        students = [Student("Danish", age) for age in range(15)]
+        self.assertEqual(
+            dictfier.dictfy(students, query, workers=2, chunk_size=10),
+            [{"name": "Danish", "age": age} for age in range(15)]
+        )
+
+    def test_parallel_refs(self):
+        students = [Student("Danish", age) for age in range(25)]
+        for mode in (dictfier.dictfy, dictfier.filter, dictfier.auto):
+            with self.assertRaises(ValueError):
+                mode(
+                    students, [["name"]], refs=True,
+                    workers=2, chunk_size=10
+                )
+
+
+#****************  benchmark suite Tests  ***************************#
+
+class TestBench(unittest.TestCase):
+    def test_run(self):
+        out = io.StringIO() if sys.version_info >= (3,) else io.BytesIO()
+        results = dictfier.bench.run(
+            scale=20, repeat=1, only=["large_iterable"], out=out
+        )
+        self.assertEqual(results["scale"], 20)
+        self.assertEqual(
+            [record["engine"] for record in results["results"]],
+            ["interpreted", "compiled", "codegen", "stack"]
+        )
+        for record in results["results"]:
+            self.assertEqual(record["workload"], "large_iterable")
+            self.assertGreater(record["ops_per_sec"], 0)
+            self.assertEqual(
+                record["objects_per_sec"], record["ops_per_sec"] * 20
+            )
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+    def test_single_object(self):
+        results = dictfier.bench.run(
+            scale=20, repeat=1, only=["single_object"], out=None
+        )
+        for record in results["results"]:
+            self.assertEqual(
+                record["objects_per_sec"], record["ops_per_sec"] * 2
+            )
+
+    def test_compare(self):
+        old = {"results": [
+            {"workload": "wide_flat", "engine": "compiled",
+             "ops_per_sec": 100.0, "peak_memory": 2048},
+            {"workload": "wide_flat", "engine": "codegen",
+             "ops_per_sec": 100.0, "peak_memory": None},
+        ]}
+        new = {"results": [
+            {"workload": "wide_flat", "engine": "compiled",
+             "ops_per_sec": 150.0, "peak_memory": 1024},
+            {"workload": "wide_flat", "engine": "codegen",
+             "ops_per_sec": 50.0, "peak_memory": None},
+            {"workload": "deep_nesting", "engine": "compiled",
+             "ops_per_sec": 50.0, "peak_memory": None},
+        ]}
+        out = io.StringIO() if sys.version_info >= (3,) else io.BytesIO()
+        dictfier.bench.compare(old, new, out)
+        lines = [line.split() for line in out.getvalue().splitlines()]
+        self.assertEqual(lines, [
+            ["workload", "engine", "speed", "memory"],
+            ["wide_flat", "compiled", "1.50x", "0.50x"],
+            ["wide_flat", "codegen", "0.50x", "-"],
+        ])
+
+    def test_memory(self):
+        out = io.StringIO() if sys.version_info >= (3,) else io.BytesIO()
+        results = dictfier.bench.memory(scale=100, out=out)
+        self.assertEqual(
+            [record["format"] for record in results],
+            ["dicts", "rows", "named rows"]
+        )
+        if dictfier.bench.tracemalloc is not None:
+            dicts, rows, named = [
+                record["retained_memory"] for record in results
+            ]
+            self.assertLess(rows, dicts)
+            self.assertLess(named, dicts)
+            self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
 if __name__ == "main":
     unittest.main()